@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import VoteRollup
+
+
+class VoteRollupAdmin(admin.ModelAdmin):
+    list_display = ('period', 'period_start', 'restaurant', 'votes')
+    list_filter = ('period', )
+    list_select_related = ('restaurant', )
+
+
+admin.site.register(VoteRollup, VoteRollupAdmin)
@@ -0,0 +1,25 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from analytics.rollups import build_rollups
+from menus.models import MenuVote
+
+
+class Command(BaseCommand):
+    help = ('Roll up and move the votes of closed days into the archive table, '
+            'keeping only the recent days in MenuVote')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-days', type=int, default=7,
+                            help='Number of recent days (today included) left in MenuVote')
+
+    def handle(self, *args, **options):
+        keep_days = options['keep_days']
+        if keep_days < 1:
+            raise CommandError('--keep-days must be at least 1, today is never archived')
+
+        build_rollups()
+        before = date.today() - timedelta(days=keep_days - 1)
+        moved = MenuVote.objects.archive(before)
+        self.stdout.write(self.style.SUCCESS(f'Archived {moved} votes cast before {before}'))
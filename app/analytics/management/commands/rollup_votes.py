@@ -0,0 +1,23 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from analytics.rollups import build_rollups
+
+
+class Command(BaseCommand):
+    help = ('Build daily, weekly and monthly vote rollups incrementally, '
+            'resuming from the last rolled up day')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=date.fromisoformat,
+                            help='Recompute from this day (YYYY-MM-DD)')
+        parser.add_argument('--full', action='store_true',
+                            help='Recompute everything from the first vote')
+
+    def handle(self, *args, **options):
+        first = build_rollups(options['since'], full=options['full'])
+        if first is None:
+            self.stdout.write('No votes to roll up')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Rolled up votes since {first}'))
@@ -0,0 +1,34 @@
+"""
+Pre-aggregated vote counts per restaurant for the analytics API
+"""
+from django.db import models
+
+from restaurants.models import Restaurant
+
+
+class VoteRollup(models.Model):
+    DAY = 'day'
+    WEEK = 'week'
+    MONTH = 'month'
+    PERIODS = [
+        (DAY, 'Day'),
+        (WEEK, 'Week'),
+        (MONTH, 'Month'),
+    ]
+
+    period = models.CharField(max_length=5, choices=PERIODS)
+    # First day of the period, weeks start on Monday
+    period_start = models.DateField()
+    restaurant = models.ForeignKey(
+        Restaurant, on_delete=models.CASCADE, related_name='vote_rollups'
+    )
+    votes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'period_start', 'restaurant'],
+                                    name='vote_rollup_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.restaurant_id} {self.period} {self.period_start}: {self.votes}'
@@ -0,0 +1,72 @@
+"""
+Incremental build of VoteRollup rows from every vote,
+hot and archived (MenuVoteHistory)
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+from menus.models import MenuVoteHistory
+from .models import VoteRollup
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def build_rollups(since=None, full=False):
+    """
+    Recompute the daily rollups from `since` on, and the weekly and monthly
+    ones containing those days. By default it resumes from the last rolled
+    up day, which is recomputed because it may have been partial, `full`
+    starts over from the first vote.
+    Returns the first day recomputed or None when there are no votes
+    """
+    if full:
+        VoteRollup.objects.all().delete()
+        since = None
+    elif since is None:
+        since = (VoteRollup.objects
+                 .filter(period=VoteRollup.DAY)
+                 .aggregate(last=Max('period_start'))['last'])
+    if since is None:
+        since = MenuVoteHistory.objects.aggregate(first=Min('created_at'))['first']
+    if since is None:
+        return None
+
+    daily = (MenuVoteHistory.objects
+             .filter(created_at__gte=since)
+             .values('created_at', 'menu__restaurant')
+             .annotate(votes=Count('pk')))
+
+    with transaction.atomic():
+        replace(VoteRollup.DAY, since, [
+            VoteRollup(period=VoteRollup.DAY, period_start=row['created_at'],
+                       restaurant_id=row['menu__restaurant'], votes=row['votes'])
+            for row in daily
+        ])
+        for period, start, trunc in ((VoteRollup.WEEK, week_start(since), TruncWeek),
+                                     (VoteRollup.MONTH, month_start(since), TruncMonth)):
+            totals = (VoteRollup.objects
+                      .filter(period=VoteRollup.DAY, period_start__gte=start)
+                      .annotate(start=trunc('period_start'))
+                      .values('start', 'restaurant')
+                      .annotate(total=Sum('votes')))
+            replace(period, start, [
+                VoteRollup(period=period, period_start=row['start'],
+                           restaurant_id=row['restaurant'], votes=row['total'])
+                for row in totals
+            ])
+
+    return since
+
+
+def replace(period, start, rollups):
+    VoteRollup.objects.filter(period=period, period_start__gte=start).delete()
+    VoteRollup.objects.bulk_create(rollups, batch_size=1000)
@@ -0,0 +1,18 @@
+from rest_framework import serializers
+
+from .models import VoteRollup
+
+
+class AnalyticsQuerySerializer(serializers.Serializer):
+    period = serializers.ChoiceField(choices=VoteRollup.PERIODS, default=VoteRollup.WEEK)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    restaurant = serializers.IntegerField(required=False)
+
+
+class VoteShareSerializer(serializers.Serializer):
+    period_start = serializers.DateField()
+    restaurant = serializers.IntegerField(source='restaurant_id')
+    restaurant_title = serializers.CharField(source='restaurant.title')
+    votes = serializers.IntegerField()
+    share = serializers.FloatField()
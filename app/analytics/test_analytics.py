@@ -0,0 +1,122 @@
+from datetime import date
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from menus.models import Menu, MenuVote, MenuVoteArchive
+from restaurants.models import Restaurant
+from .models import VoteRollup
+from .rollups import build_rollups
+from .views import VoteAnalyticsViewSet
+
+User = get_user_model()
+
+# Wednesday and Thursday of one week, and a Monday of the next month
+DAYS = [date(2025, 4, 30), date(2025, 5, 1), date(2025, 5, 5)]
+
+
+@pytest.fixture
+def restaurants():
+    manager = User.objects.create_user(email='staff@example.com', password='testpass123',
+                                       is_restaurant_staff=True)
+    return [Restaurant.objects.create(manager=manager, title=title, address='1 St', phone_number='+1')
+            for title in ('First', 'Second')]
+
+
+def add_votes(restaurant, day, count):
+    menu, _ = Menu.objects.get_or_create(restaurant=restaurant, date=date.today())
+    Menu.objects.filter(pk=menu.pk).update(date=day)
+    for _ in range(count):
+        user = User.objects.create_user(email=f'{restaurant.pk}-{day}-{User.objects.count()}@example.com')
+        vote = MenuVote.objects.create(menu_id=menu.pk, user=user)
+        MenuVote.objects.filter(pk=vote.pk).update(created_at=day)
+
+
+@pytest.fixture
+def votes(restaurants):
+    first, second = restaurants
+    add_votes(first, DAYS[0], 3)
+    add_votes(second, DAYS[0], 1)
+    add_votes(second, DAYS[1], 4)
+    add_votes(first, DAYS[2], 2)
+
+
+def rollup_votes(period):
+    return {(rollup.period_start, rollup.restaurant.title): rollup.votes
+            for rollup in VoteRollup.objects.filter(period=period)}
+
+
+@pytest.mark.django_db
+class TestRollups:
+    def test_daily_weekly_monthly(self, votes):
+        assert build_rollups() == DAYS[0]
+        assert rollup_votes(VoteRollup.DAY) == {
+            (DAYS[0], 'First'): 3, (DAYS[0], 'Second'): 1,
+            (DAYS[1], 'Second'): 4, (DAYS[2], 'First'): 2,
+        }
+        assert rollup_votes(VoteRollup.WEEK) == {
+            (date(2025, 4, 28), 'First'): 3, (date(2025, 4, 28), 'Second'): 5,
+            (date(2025, 5, 5), 'First'): 2,
+        }
+        assert rollup_votes(VoteRollup.MONTH) == {
+            (date(2025, 4, 1), 'First'): 3, (date(2025, 4, 1), 'Second'): 1,
+            (date(2025, 5, 1), 'Second'): 4, (date(2025, 5, 1), 'First'): 2,
+        }
+
+    def test_incremental_run_resumes_from_last_day(self, votes, restaurants):
+        build_rollups()
+        add_votes(restaurants[1], DAYS[2], 1)
+        assert build_rollups() == DAYS[2]
+        assert rollup_votes(VoteRollup.DAY)[(DAYS[2], 'Second')] == 1
+        assert rollup_votes(VoteRollup.DAY)[(DAYS[0], 'First')] == 3
+        assert rollup_votes(VoteRollup.MONTH)[(date(2025, 5, 1), 'Second')] == 5
+
+    def test_command(self, votes):
+        call_command('rollup_votes', full=True)
+        assert VoteRollup.objects.filter(period=VoteRollup.DAY).count() == 4
+
+    def test_archive_votes_command(self, votes):
+        call_command('archive_votes', keep_days=1)
+        assert not MenuVote.objects.exists()
+        assert MenuVoteArchive.objects.count() == 10
+        assert rollup_votes(VoteRollup.WEEK)[(date(2025, 4, 28), 'Second')] == 5
+
+        # Rebuilding from scratch reads the archived votes
+        build_rollups(full=True)
+        assert rollup_votes(VoteRollup.MONTH)[(date(2025, 5, 1), 'First')] == 2
+
+    def test_no_votes(self):
+        assert build_rollups() is None
+
+
+@pytest.mark.django_db
+class TestVoteAnalyticsViewSet:
+    def get(self, action, params):
+        request = APIRequestFactory().get(f'/analytics/{action}/', params)
+        force_authenticate(request, user=User.objects.create_user(email='employee@example.com'))
+        return VoteAnalyticsViewSet.as_view({'get': action})(request)
+
+    def test_weekly_winners(self, votes):
+        build_rollups()
+        response = self.get('winners', {'period': 'week'})
+        assert response.status_code == status.HTTP_200_OK
+        assert [(row['period_start'], row['restaurant_title'], row['votes'], row['share'])
+                for row in response.data] == [('2025-04-28', 'Second', 5, 0.625),
+                                              ('2025-05-05', 'First', 2, 1.0)]
+
+    def test_monthly_share_of_restaurant(self, votes, restaurants):
+        build_rollups()
+        response = self.get('share', {'period': 'month', 'restaurant': restaurants[0].pk})
+        assert [(row['period_start'], row['share']) for row in response.data] == [
+            ('2025-04-01', 0.75), ('2025-05-01', 0.3333)]
+
+    def test_invalid_period(self):
+        assert self.get('share', {'period': 'year'}).status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_requires_authentication(self):
+        request = APIRequestFactory().get('/analytics/share/')
+        response = VoteAnalyticsViewSet.as_view({'get': 'share'})(request)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,10 @@
+from django.urls import path
+from .views import VoteAnalyticsViewSet
+
+app_name = 'analytics'
+
+
+urlpatterns = [
+    path('winners/', VoteAnalyticsViewSet.as_view({'get': 'winners'}), name='winners'),
+    path('share/', VoteAnalyticsViewSet.as_view({'get': 'share'}), name='share'),
+]
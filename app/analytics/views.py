@@ -0,0 +1,54 @@
+"""
+Vote analytics served from the VoteRollup table
+"""
+from collections import defaultdict
+
+from rest_framework import permissions, viewsets
+from rest_framework.response import Response
+
+from offices.tenancy import request_office
+from .models import VoteRollup
+from .serializers import AnalyticsQuerySerializer, VoteShareSerializer
+
+
+class VoteAnalyticsViewSet(viewsets.ViewSet):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def winners(self, request):
+        """The restaurant with most votes in every period"""
+        winners = {}
+        for rollup in self.get_rollups(request):
+            best = winners.get(rollup.period_start)
+            if best is None or rollup.votes > best.votes:
+                winners[rollup.period_start] = rollup
+        return Response(VoteShareSerializer(winners.values(), many=True).data)
+
+    def share(self, request):
+        """Votes and vote share of every restaurant in every period"""
+        return Response(VoteShareSerializer(self.get_rollups(request), many=True).data)
+
+    def get_rollups(self, request):
+        query = AnalyticsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        rollups = (VoteRollup.objects
+                   .filter(period=params['period'], restaurant__office=request_office(request))
+                   .select_related('restaurant')
+                   .order_by('period_start', 'restaurant_id'))
+        if 'date_from' in params:
+            rollups = rollups.filter(period_start__gte=params['date_from'])
+        if 'date_to' in params:
+            rollups = rollups.filter(period_start__lte=params['date_to'])
+        rollups = list(rollups)
+
+        totals = defaultdict(int)
+        for rollup in rollups:
+            totals[rollup.period_start] += rollup.votes
+        for rollup in rollups:
+            total = totals[rollup.period_start]
+            rollup.share = round(rollup.votes / total, 4) if total else 0.0
+
+        if 'restaurant' in params:
+            rollups = [rollup for rollup in rollups if rollup.restaurant_id == params['restaurant']]
+        return rollups
@@ -9,6 +9,7 @@ https://docs.djangoproject.com/en/5.1/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
+import copy
 import os
 from pathlib import Path
 from datetime import timedelta
@@ -24,7 +25,8 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = 'django-insecure-1%c#)svmmozy#z_6i^cm4lb28x92-hwj=npx*goca_b0tp*w&!'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# DEBUG also keeps every executed query in connection.queries
+DEBUG = os.environ.get('DJANGO_DEBUG', '1') == '1'
 
 ALLOWED_HOSTS = ['*']
 
@@ -33,8 +35,12 @@ ALLOWED_HOSTS = ['*']
 
 INSTALLED_APPS = [
     'users',
+    'offices',
+    'common',
     'restaurants',
     'menus',
+    'analytics',
+    'benchmarks',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -45,11 +51,15 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'common.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'common.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
 SIMPLE_JWT = {
@@ -64,15 +74,47 @@ SIMPLE_JWT = {
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'common.instrumentation_middleware.InstrumentationMiddleware',
+    'common.db_router.PrimaryPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'common.version_control_middleware.VersionControlMiddleware',
+    'common.tenant_middleware.TenantMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Server-Timing headers and a JSON log line per request,
+# see common/instrumentation_middleware.py
+INSTRUMENTATION = {
+    'ENABLED': os.environ.get('INSTRUMENTATION_ENABLED', '1') == '1',
+    'QUERY_COUNT_THRESHOLD': int(os.environ.get('INSTRUMENTATION_QUERY_COUNT_THRESHOLD', 10)),
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'lunch.instrumentation': {
+            'handlers': ['console'],
+            'level': os.environ.get('INSTRUMENTATION_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+        'lunch.tasks': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 ROOT_URLCONF = 'app.urls'
 
 TEMPLATES = [
@@ -97,17 +139,152 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'HOST': os.environ.get('DB_HOST'),
-        'NAME': os.environ.get('DB_NAME'),
-        'USER': os.environ.get('DB_USER'),
-        'PASSWORD': os.environ.get('DB_PASS'),
+# DB_POOL=1 hands out connections from a psycopg 3 pool (Django closes them
+# back into it after every request), otherwise a connection is kept open for
+# DB_CONN_MAX_AGE seconds by its thread, which suits WSGI workers only: under
+# ASGI every request gets connections of its own. The image sets DB_POOL=1.
+DB_POOL = os.environ.get('DB_POOL', '0') == '1'
+
+# DB_ENGINE=sqlite runs on the DB_NAME file (db.sqlite3 by default) instead
+# of Postgres, e.g. to seed_data and loadtest locally
+DB_ENGINE = os.environ.get('DB_ENGINE', 'postgresql')
+
+if DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME') or BASE_DIR / 'db.sqlite3',
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'HOST': os.environ.get('DB_HOST'),
+            'PORT': os.environ.get('DB_PORT', ''),
+            'NAME': os.environ.get('DB_NAME'),
+            'USER': os.environ.get('DB_USER'),
+            'PASSWORD': os.environ.get('DB_PASS'),
+            # The pool does not support persistent connections
+            'CONN_MAX_AGE': 0 if DB_POOL else int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1',
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+                    'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+                    'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+                },
+            } if DB_POOL else {},
+        }
+    }
+
+# Read replicas, DB_REPLICA_HOSTS=host1,host2 adds the aliases replica_1,
+# replica_2 (same credentials as the primary). Reads of safe requests go to
+# them, see common/db_router.py. Tests read them through the primary.
+DATABASE_REPLICAS = []
+for number, replica_host in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), 1):
+    DATABASES[f'replica_{number}'] = {
+        **copy.deepcopy(DATABASES['default']),
+        'HOST': replica_host.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{number}')
+
+DATABASE_ROUTERS = ['common.db_router.ReplicaRouter']
+
+# Seconds a client reads from the primary after a write, above the replication lag
+DATABASE_REPLICA_PIN_SECONDS = int(os.environ.get('DB_REPLICA_PIN_SECONDS', 5))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Rendered today_menu/today_rating responses, see menus/cache.py. With Redis
+# they are shared between workers, otherwise each worker keeps its own copy
+# for at most MENU_RANKING_CACHE_TIMEOUT seconds after a change elsewhere.
+MENU_RANKING_CACHE = {
+    'BACKEND': os.environ.get(
+        'MENU_RANKING_CACHE_BACKEND',
+        'menus.cache.DjangoCacheBackend' if os.environ.get('REDIS_URL') else 'menus.cache.LocMemBackend',
+    ),
+    'OPTIONS': {
+        'timeout': int(os.environ.get(
+            'MENU_RANKING_CACHE_TIMEOUT', 24 * 60 * 60 if os.environ.get('REDIS_URL') else 5)),
+    },
+}
+
+
+# Live ranking streams, see menus/events.py. Redis pub/sub delivers the
+# votes recorded by any worker, the local broker only within the process.
+if os.environ.get('REDIS_URL'):
+    MENU_EVENTS = {
+        'BROKER': 'menus.events.RedisBroker',
+        'OPTIONS': {'url': os.environ.get('REDIS_URL')},
+    }
+else:
+    MENU_EVENTS = {
+        'BROKER': 'menus.events.LocalBroker',
     }
+
+
+# Offices (tenants), see common/tenant_middleware.py. Requests without an
+# X-Office header nor an office subdomain of DOMAIN use the DEFAULT office.
+OFFICES = {
+    'DEFAULT': os.environ.get('OFFICES_DEFAULT', 'main'),
+    'DOMAIN': os.environ.get('OFFICES_DOMAIN', ''),
+    # Seconds the other workers keep serving an office (or its absence) after a change
+    'CACHE_TIMEOUT': int(os.environ.get('OFFICES_CACHE_TIMEOUT', 30)),
 }
 
 
+# Local time (HH:MM) after which the day's voting is closed and the day
+# can be finalized into a DailyResult, see menus/voting.py
+MENU_VOTING_CUTOFF = os.environ.get('MENU_VOTING_CUTOFF', '14:00')
+
+
+# Background tasks, see common/tasks.py
+TASKS = {
+    'BACKEND': os.environ.get('TASKS_BACKEND', 'common.tasks.ThreadPoolBackend'),
+    'OPTIONS': {'max_workers': int(os.environ.get('TASKS_MAX_WORKERS', 4))},
+}
+
+
+# Password hashing off the request threads, see users/hashing.py.
+# ITERATIONS is the PBKDF2 work factor, size it with bench_hashers
+PASSWORD_HASHING = {
+    'BACKEND': os.environ.get('PASSWORD_HASHING_BACKEND', 'users.hashing.ProcessPoolBackend'),
+    'OPTIONS': {
+        'max_workers': int(os.environ.get('PASSWORD_HASHING_WORKERS', 2)),
+        'max_pending': int(os.environ.get('PASSWORD_HASHING_MAX_PENDING', 64)),
+        'timeout': float(os.environ.get('PASSWORD_HASHING_TIMEOUT', 10)),
+    },
+    'ITERATIONS': int(os.environ.get('PASSWORD_HASHING_ITERATIONS', 0)) or None,
+}
+
+# The first one hashes new passwords, the others verify older hashes
+PASSWORD_HASHERS = [
+    'users.hashers.TunedPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -17,9 +17,17 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from common.health import healthz, readyz
+
 urlpatterns = [
+    path('healthz/', healthz, name='healthz'),
+    path('readyz/', readyz, name='readyz'),
     path('admin/', admin.site.urls),
     path('api/user/', include('users.urls')),
     path('api/restaurants/', include('restaurants.urls')),
     path('api/menus/', include('menus.urls')),
+    path('api/analytics/', include('analytics.urls')),
+    path('api/async/user/', include('users.async_urls')),
+    path('api/async/restaurants/', include('restaurants.async_urls')),
+    path('api/async/menus/', include('menus.async_urls')),
 ]
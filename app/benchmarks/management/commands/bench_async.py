@@ -0,0 +1,72 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client
+
+from benchmarks.stats import format_row, summarize
+
+# (WSGI/DRF endpoint, ASGI native twin)
+ENDPOINTS = [
+    ('/api/menus/', '/api/async/menus/'),
+    ('/api/menus/today_menu/', '/api/async/menus/today_menu/'),
+    ('/api/menus/today_rating/', '/api/async/menus/today_rating/'),
+    ('/api/restaurants/', '/api/async/restaurants/'),
+]
+
+
+class Command(BaseCommand):
+    help = ('Compare requests per second of the sync (WSGI) read endpoints '
+            'with their async (ASGI) twins under concurrent load. Both run '
+            'in process against the configured database, seed it first '
+            'with the seed_data command.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500,
+                            help='Requests per endpoint and mode')
+        parser.add_argument('--concurrency', type=int, default=20,
+                            help='Requests in flight at the same time')
+
+    def handle(self, *args, **options):
+        total = options['requests']
+        concurrency = options['concurrency']
+
+        for sync_path, async_path in ENDPOINTS:
+            summary = self.run_wsgi(sync_path, total, concurrency)
+            self.stdout.write(format_row(f'WSGI {sync_path}', summary))
+            summary = asyncio.run(self.run_asgi(async_path, total, concurrency))
+            self.stdout.write(format_row(f'ASGI {async_path}', summary))
+
+    def run_wsgi(self, path, total, concurrency):
+        client = Client()
+
+        def fetch(_):
+            started = time.perf_counter()
+            response = client.get(path)
+            self.check_response(path, response)
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            latencies = list(executor.map(fetch, range(total)))
+        return summarize(latencies, time.perf_counter() - started)
+
+    async def run_asgi(self, path, total, concurrency):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path)
+                self.check_response(path, response)
+                return time.perf_counter() - started
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(fetch() for _ in range(total)))
+        return summarize(latencies, time.perf_counter() - started)
+
+    def check_response(self, path, response):
+        if response.status_code != 200:
+            raise RuntimeError(f'{path} answered {response.status_code}')
@@ -0,0 +1,96 @@
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import RequestFactory
+
+from benchmarks.stats import format_row, summarize
+
+MODES = ('fresh', 'persistent', 'pool')
+
+
+class Command(BaseCommand):
+    help = ('Per request latency with a new database connection per request, '
+            'persistent connections (CONN_MAX_AGE) and the psycopg 3 pool. '
+            'Requests go through the WSGI handler in process, so Django opens '
+            'and closes connections at request boundaries like under a server.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500,
+                            help='Requests per mode')
+        parser.add_argument('--concurrency', type=int, default=4,
+                            help='Worker threads, each keeps its own connection')
+        parser.add_argument('--path', default='/api/restaurants/')
+        parser.add_argument('--mode', action='append', choices=MODES,
+                            help='Modes to run (repeatable), all by default')
+
+    def handle(self, *args, **options):
+        # Shared by every thread's connection, so it is changed in place
+        db_settings = connections.settings['default']
+        original = copy.deepcopy(db_settings)
+
+        for mode in options['mode'] or MODES:
+            if mode == 'pool' and not self.pool_supported():
+                self.stdout.write(f'{mode:<12} skipped, needs PostgreSQL with psycopg 3 and psycopg_pool')
+                continue
+
+            connections['default'].close()
+            db_settings.update(self.mode_settings(mode, original, options['concurrency']))
+            try:
+                summary = self.run(options['path'], options['requests'], options['concurrency'])
+            finally:
+                if mode == 'pool':
+                    connections['default'].close_pool()
+                db_settings.clear()
+                db_settings.update(copy.deepcopy(original))
+            self.stdout.write(format_row(f'{mode} {options["path"]}', summary))
+
+    @staticmethod
+    def mode_settings(mode, original, concurrency):
+        options = {key: value for key, value in original['OPTIONS'].items() if key != 'pool'}
+        if mode == 'pool':
+            options['pool'] = {'min_size': concurrency, 'max_size': concurrency}
+        return {
+            'CONN_MAX_AGE': 600 if mode == 'persistent' else 0,
+            'CONN_HEALTH_CHECKS': mode == 'persistent',
+            'OPTIONS': options,
+        }
+
+    @staticmethod
+    def pool_supported():
+        if connections['default'].vendor != 'postgresql':
+            return False
+        try:
+            import psycopg_pool  # noqa: F401
+        except ImportError:
+            return False
+        from django.db.backends.postgresql.psycopg_any import is_psycopg3
+        return is_psycopg3
+
+    def run(self, path, total, concurrency):
+        handler = WSGIHandler()
+
+        def worker(count):
+            latencies = []
+            try:
+                for _ in range(count):
+                    environ = RequestFactory().get(path).environ
+                    started = time.perf_counter()
+                    response = handler(environ, lambda status, headers: None)
+                    # Fires request_finished, which closes or keeps the connection
+                    response.close()
+                    latencies.append(time.perf_counter() - started)
+                    if response.status_code != 200:
+                        raise RuntimeError(f'{path} answered {response.status_code}')
+            finally:
+                connections.close_all()
+            return latencies
+
+        shares = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            latencies = [latency for part in executor.map(worker, shares) for latency in part]
+        return summarize(latencies, time.perf_counter() - started)
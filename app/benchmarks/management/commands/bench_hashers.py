@@ -0,0 +1,59 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, get_hasher, get_hashers
+from django.core.management.base import BaseCommand
+
+PASSWORD = 'bench-password'
+
+
+class Command(BaseCommand):
+    help = ('Time one password verification with every hasher of PASSWORD_HASHERS, '
+            'recommend PASSWORD_HASHING_ITERATIONS for a target login cost and count '
+            'the users whose hash is upgraded to the first hasher on their next login')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Verifications per hasher, the median is reported')
+        parser.add_argument('--target-ms', type=float, default=100,
+                            help='Wanted cost of one login on one core')
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        preferred = get_hasher()
+
+        for hasher in get_hashers():
+            name = type(hasher).__name__
+            try:
+                encoded = hasher.encode(PASSWORD, hasher.salt())
+            except ValueError as exc:
+                # The library of the hasher is not installed
+                self.stdout.write(f'{name:<28} skipped: {exc}')
+                continue
+            cost = self.verify_ms(hasher, encoded, repeat)
+            self.stdout.write(f'{name:<28} {cost:>8.1f} ms/login '
+                              f'{1000 / cost:>8.1f} logins/s per core')
+
+        if isinstance(preferred, PBKDF2PasswordHasher):
+            encoded = preferred.encode(PASSWORD, preferred.salt())
+            cost = self.verify_ms(preferred, encoded, repeat)
+            tuned = max(10_000, round(preferred.iterations * options['target_ms'] / cost, -4))
+            self.stdout.write(f'{preferred.iterations} iterations take {cost:.1f} ms, '
+                              f'for ~{options["target_ms"]:g} ms set PASSWORD_HASHING_ITERATIONS={tuned:.0f}')
+
+            current = f'{preferred.algorithm}${preferred.iterations}$'
+            pending = (get_user_model().objects
+                       .exclude(password__startswith=current)
+                       .exclude(password__startswith='!')  # unusable passwords
+                       .count())
+            self.stdout.write(f'{pending} users will be rehashed with {current[:-1]} on their next login')
+
+    @staticmethod
+    def verify_ms(hasher, encoded, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            hasher.verify(PASSWORD, encoded)
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings) * 1000
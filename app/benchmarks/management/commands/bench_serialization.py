@@ -0,0 +1,63 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from common.renderers import ORJSONRenderer
+from menus.models import Menu
+from menus.serializers import MenuSerializer
+from restaurants.models import Restaurant
+from restaurants.serializers import RestaurantSerializer
+
+MODELS = [
+    (Menu, MenuSerializer),
+    (Restaurant, RestaurantSerializer),
+]
+
+
+class Command(BaseCommand):
+    help = ('Per row cost of the list payloads: ModelSerializer + JSONRenderer '
+            'against .values() rows + ORJSONRenderer (the FastReadMixin path). '
+            'Runs against the configured database, seed it first with seed_data.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000,
+                            help='Rows fetched per run')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Runs per path, the median is reported')
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+
+        for model, serializer_class in MODELS:
+            queryset = model.objects.order_by('pk')[:rows]
+            fields = [name for name, field in serializer_class().fields.items() if not field.write_only]
+            count = queryset.count()
+            if not count:
+                raise CommandError(f'No {model._meta.verbose_name_plural} to serialize, run seed_data first')
+
+            def serializer_path():
+                return JSONRenderer().render(serializer_class(queryset, many=True).data)
+
+            def fast_path():
+                return ORJSONRenderer().render(list(queryset.values(*fields)))
+
+            if serializer_path() != fast_path():
+                raise CommandError(f'{model.__name__} payloads differ between the two paths')
+
+            before = self.per_row_us(serializer_path, count, repeat)
+            after = self.per_row_us(fast_path, count, repeat)
+            self.stdout.write(f'{model.__name__:<12} {count:>6} rows '
+                              f'serializer {before:>8.2f} us/row '
+                              f'values+orjson {after:>8.2f} us/row '
+                              f'x{before / after:.1f}')
+
+    @staticmethod
+    def per_row_us(render, count, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            render()
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings) / count * 1_000_000
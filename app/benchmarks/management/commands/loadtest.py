@@ -0,0 +1,136 @@
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+
+from benchmarks import seeding
+from benchmarks.stats import format_row, summarize
+from menus.models import Menu
+from users.tokens import ClaimsRefreshToken
+
+SCENARIOS = ('login', 'vote', 'today_rating', 'restaurants')
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = ('Drive the API concurrently with the data created by seed_data and '
+            'report p50/p95/p99 latency, throughput and queries per request. '
+            'Requests run in process unless --base-url points to a running server.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Requests per scenario')
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--scenario', choices=SCENARIOS, action='append',
+                            help='Scenario to run, may be repeated (default: all)')
+        parser.add_argument('--base-url',
+                            help='Run against a server, e.g. http://localhost:8000 '
+                                 '(queries per request are not reported then)')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        users = list(seeding.bench_users().filter(is_restaurant_staff=False))
+        if not users:
+            raise CommandError('No benchmark data, run seed_data first')
+
+        rng = random.Random(options['seed'])
+        total = options['requests']
+        self.base_url = options['base_url']
+        for name in options['scenario'] or SCENARIOS:
+            requests = getattr(self, f'build_{name}')(users, total, rng)
+            if not requests:
+                self.stderr.write(f'{name}: nothing to send, reseed with --reset')
+                continue
+            result = self.run(requests, options['concurrency'])
+            line = format_row(name, result)
+            if result['queries'] is not None:
+                line += f" {result['queries']:>6.1f} queries/req"
+            self.stdout.write(f"{line} {result['errors']} errors")
+
+    def build_login(self, users, total, rng):
+        return [{'method': 'post', 'path': '/api/user/login/', 'expected': 200,
+                 'data': {'email': rng.choice(users).email, 'password': seeding.BENCH_PASSWORD}}
+                for _ in range(total)]
+
+    def build_vote(self, users, total, rng):
+        # every user can vote once a day, so each request uses another user
+        menu_ids = list(Menu.objects.filter(date=date.today()).values_list('pk', flat=True))
+        voters = (seeding.bench_users()
+                  .filter(is_restaurant_staff=False)
+                  .exclude(menuvote__created_at=date.today())[:total])
+        if not menu_ids:
+            return []
+        return [{'method': 'post', 'path': '/api/menus/vote/', 'expected': 201,
+                 'data': {'menu': rng.choice(menu_ids)},
+                 'headers': {'Authorization': f'Bearer {ClaimsRefreshToken.for_user(voter).access_token}',
+                             'X-App-Version': '2.0.0'}}
+                for voter in voters]
+
+    def build_today_rating(self, users, total, rng):
+        return [{'method': 'get', 'path': '/api/menus/today_rating/', 'expected': 200}] * total
+
+    def build_restaurants(self, users, total, rng):
+        return [{'method': 'get', 'path': '/api/restaurants/', 'expected': 200}] * total
+
+    def run(self, requests, concurrency):
+        local = threading.local()
+        errors = []
+        queries = []
+
+        def send(spec):
+            started = time.perf_counter()
+            if self.base_url:
+                status = self.send_http(spec)
+            else:
+                if not hasattr(local, 'client'):
+                    local.client = Client()
+                counter = QueryCounter()
+                with connection.execute_wrapper(counter):
+                    status = self.send_in_process(local.client, spec)
+                queries.append(counter.count)
+            if status != spec['expected']:
+                errors.append(status)
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            latencies = list(executor.map(send, requests))
+        result = summarize(latencies, time.perf_counter() - started)
+        result['errors'] = len(errors)
+        result['queries'] = sum(queries) / len(queries) if queries else None
+        return result
+
+    def send_in_process(self, client, spec):
+        method = getattr(client, spec['method'])
+        kwargs = {'headers': spec.get('headers', {})}
+        if 'data' in spec:
+            kwargs.update(data=spec['data'], content_type='application/json')
+        return method(spec['path'], **kwargs).status_code
+
+    def send_http(self, spec):
+        body = json.dumps(spec['data']).encode() if 'data' in spec else None
+        headers = {'Content-Type': 'application/json', **spec.get('headers', {})}
+        request = urllib.request.Request(self.base_url.rstrip('/') + spec['path'], data=body,
+                                         headers=headers, method=spec['method'].upper())
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as exc:
+            return exc.code
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from benchmarks import seeding
+
+
+class Command(BaseCommand):
+    help = 'Seed restaurants, months of menus, users and votes for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurants', type=int, default=20)
+        parser.add_argument('--days', type=int, default=90,
+                            help='Days of menu history, today included')
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--vote-ratio', type=float, default=0.8,
+                            help='Share of users who voted on a past day')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Random seed, the same seed gives the same data')
+        parser.add_argument('--reset', action='store_true',
+                            help='Remove previously seeded data first')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            seeding.reset()
+        elif seeding.bench_users().exists():
+            self.stderr.write('Benchmark data already exists, use --reset to recreate it')
+            return
+
+        counts = seeding.seed(restaurants=options['restaurants'],
+                              days=options['days'],
+                              users=options['users'],
+                              vote_ratio=options['vote_ratio'],
+                              seed_value=options['seed'],
+                              stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            'Seeded {restaurants} restaurants, {menus} menus, {users} users and {votes} votes'.format(**counts)))
@@ -0,0 +1,112 @@
+"""
+Realistic data volumes for the load test, every seeded user has
+a BENCH_EMAIL_DOMAIN e-mail so the data can be told apart and removed
+"""
+import contextlib
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from menus.models import Menu, MenuVote
+from offices.tenancy import default_office_id
+from restaurants.models import Restaurant
+
+BENCH_EMAIL_DOMAIN = 'bench.lunch.local'
+BENCH_PASSWORD = 'bench-password'
+BATCH_SIZE = 5000
+DISHES = [
+    'Borscht', 'Varenyky', 'Holubtsi', 'Deruny', 'Chicken Kyiv', 'Banosh',
+    'Caesar salad', 'Greek salad', 'Pasta carbonara', 'Lasagna', 'Risotto',
+    'Pad thai', 'Ramen', 'Pho', 'Falafel', 'Shawarma', 'Burger', 'Pizza',
+    'Tomato soup', 'Mushroom soup', 'Syrniki', 'Pancakes', 'Plov', 'Goulash',
+]
+
+
+def bench_users():
+    return get_user_model().objects.filter(email__endswith=f'@{BENCH_EMAIL_DOMAIN}')
+
+
+@contextlib.contextmanager
+def explicit_dates(*fields):
+    """Let bulk_create keep the dates we set on auto_now_add fields"""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def reset():
+    """Remove seeded users, their restaurants, menus and votes cascade"""
+    return bench_users().delete()
+
+
+def seed(restaurants=20, days=90, users=2000, vote_ratio=0.8, seed_value=0, stdout=None):
+    """
+    Create restaurant managers, restaurants (of the default office) with a menu for every one of
+    the last `days` days (today included), employees and their votes for
+    the past days. Today is left without votes for the vote scenario
+    """
+    rng = random.Random(seed_value)
+    User = get_user_model()
+    password = make_password(BENCH_PASSWORD)
+    office_id = default_office_id()
+    today = date.today()
+
+    def log(message):
+        if stdout is not None:
+            stdout.write(message)
+
+    with transaction.atomic():
+        managers = User.objects.bulk_create([
+            User(email=f'manager-{i}@{BENCH_EMAIL_DOMAIN}', name=f'Manager {i}',
+                 password=password, is_restaurant_staff=True, office_id=office_id)
+            for i in range(restaurants)
+        ])
+        restaurant_objs = Restaurant.objects.bulk_create([
+            Restaurant(manager=manager, office_id=office_id, title=f'Restaurant {i}',
+                       address=f'{i} Bench St', phone_number=f'+380{i:09d}')
+            for i, manager in enumerate(managers)
+        ])
+        log(f'Created {len(restaurant_objs)} restaurants')
+
+        vote_date = MenuVote._meta.get_field('created_at')
+        with explicit_dates(vote_date):
+            menus = Menu.objects.bulk_create([
+                Menu(restaurant=restaurant, office_id=office_id, date=today - timedelta(days=offset),
+                     dishes=', '.join(rng.sample(DISHES, 3)))
+                for offset in range(days)
+                for restaurant in restaurant_objs
+            ], batch_size=BATCH_SIZE)
+            log(f'Created {len(menus)} menus')
+
+            employees = User.objects.bulk_create([
+                User(email=f'user-{i}@{BENCH_EMAIL_DOMAIN}', name=f'User {i}', password=password,
+                     office_id=office_id)
+                for i in range(users)
+            ], batch_size=BATCH_SIZE)
+            log(f'Created {len(employees)} users')
+
+            menus_by_date = {}
+            for menu in menus:
+                menus_by_date.setdefault(menu.date, []).append(menu)
+
+            votes = []
+            for offset in range(1, days):
+                day = today - timedelta(days=offset)
+                for employee in employees:
+                    if rng.random() < vote_ratio:
+                        votes.append(MenuVote(menu=rng.choice(menus_by_date[day]),
+                                              user=employee, office_id=office_id, created_at=day))
+            MenuVote.objects.bulk_create(votes, batch_size=BATCH_SIZE)
+            log(f'Created {len(votes)} votes')
+
+        Menu.objects.rebuild_vote_counts()
+
+    return {'restaurants': len(restaurant_objs), 'menus': len(menus),
+            'users': len(employees), 'votes': len(votes)}
@@ -0,0 +1,32 @@
+"""
+Helpers to summarize benchmark samples
+"""
+import math
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of the samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies, elapsed):
+    """Latencies in seconds -> milliseconds percentiles and throughput"""
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
+
+
+def format_row(name, summary):
+    return (f"{name:<40} {summary['requests']:>7} req "
+            f"{summary['rps']:>9.1f} req/s "
+            f"p50 {summary['p50_ms']:>7.2f} ms "
+            f"p95 {summary['p95_ms']:>7.2f} ms "
+            f"p99 {summary['p99_ms']:>7.2f} ms")
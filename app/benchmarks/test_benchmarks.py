@@ -0,0 +1,87 @@
+from datetime import date
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from menus.models import Menu, MenuVote
+from . import seeding
+from .stats import percentile, summarize
+
+
+def test_percentile():
+    samples = list(range(1, 101))
+    assert percentile(samples, 50) == 50
+    assert percentile(samples, 99) == 99
+    assert percentile([], 50) == 0.0
+
+
+def test_summarize():
+    summary = summarize([0.01, 0.02, 0.03, 0.04], elapsed=0.5)
+    assert summary['requests'] == 4
+    assert summary['rps'] == 8
+    assert summary['p50_ms'] == pytest.approx(20)
+
+
+@pytest.mark.django_db
+def test_seed_creates_history_without_votes_for_today():
+    counts = seeding.seed(restaurants=3, days=5, users=10, vote_ratio=1)
+    assert counts == {'restaurants': 3, 'menus': 15, 'users': 10, 'votes': 40}
+    assert Menu.objects.filter(date=date.today()).count() == 3
+    assert not MenuVote.objects.filter(created_at=date.today()).exists()
+    assert sum(Menu.objects.values_list('vote_count', flat=True)) == 40
+
+
+@pytest.mark.django_db
+def test_seed_data_refuses_to_seed_twice():
+    call_command('seed_data', restaurants=1, days=1, users=1, stdout=StringIO())
+    err = StringIO()
+    call_command('seed_data', restaurants=1, days=1, users=1, stdout=StringIO(), stderr=err)
+    assert 'already exists' in err.getvalue()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_loadtest_reports_scenarios(settings):
+    settings.TASKS = {'BACKEND': 'common.tasks.ImmediateBackend'}
+    settings.MENU_VOTING_CUTOFF = '23:59:59.999999'
+    seeding.seed(restaurants=2, days=2, users=5)
+    out = StringIO()
+    call_command('loadtest', requests=5, concurrency=1,
+                 scenario=['vote', 'today_rating', 'restaurants'], stdout=out)
+    output = out.getvalue()
+    assert 'vote' in output and 'queries/req' in output
+    assert ' 0 errors' in output
+    assert MenuVote.objects.filter(created_at=date.today()).count() == 5
+
+
+@pytest.mark.django_db
+def test_bench_serialization_checks_identical_payloads():
+    seeding.seed(restaurants=2, days=3, users=2)
+    out = StringIO()
+    call_command('bench_serialization', rows=10, repeat=1, stdout=out)
+    output = out.getvalue()
+    assert 'Menu' in output and 'Restaurant' in output
+    assert 'us/row' in output
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bench_connections_runs_every_available_mode():
+    out = StringIO()
+    call_command('bench_connections', requests=3, concurrency=1, stdout=out)
+    output = out.getvalue()
+    assert 'fresh /api/restaurants/' in output
+    assert 'persistent /api/restaurants/' in output
+    assert 'pool' in output
+
+
+@pytest.mark.django_db
+def test_bench_hashers_recommends_iterations(settings):
+    seeding.seed(restaurants=1, days=1, users=2)
+    settings.PASSWORD_HASHING = {'BACKEND': 'users.hashing.InlineBackend', 'ITERATIONS': 1000}
+    out = StringIO()
+    call_command('bench_hashers', repeat=1, target_ms=1, stdout=out)
+    output = out.getvalue()
+    assert 'TunedPBKDF2PasswordHasher' in output and 'ms/login' in output
+    assert 'PASSWORD_HASHING_ITERATIONS=' in output
+    # Seeded with the default work factor, not the tuned 1000 iterations
+    assert '3 users will be rehashed with pbkdf2_sha256$1000' in output
@@ -0,0 +1,104 @@
+"""
+JWT authentication that resolves the user from the token claims,
+for the DRF views and the async (ASGI native) views
+"""
+import functools
+
+from django.contrib.auth.models import AnonymousUser
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from users.tokens import (aget_token_version, get_token_version,
+                          has_user_claims, user_from_claims)
+from .responses import json_response
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Builds request.user from the claims of tokens issued by the login view,
+    so no user row is loaded. Tokens without the claims (issued before)
+    fall back to the database lookup of JWTAuthentication
+    """
+    def get_user(self, validated_token):
+        if not has_user_claims(validated_token):
+            return super().get_user(validated_token)
+
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        return self.check_claims(validated_token, get_token_version(user_id))
+
+    @staticmethod
+    def check_claims(validated_token, current_version):
+        if current_version is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        if validated_token['token_version'] < current_version:
+            raise AuthenticationFailed(_('Token has been revoked'), code='token_revoked')
+
+        user = user_from_claims(validated_token)
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        return user
+
+
+class AsyncJWTAuthentication(ClaimsJWTAuthentication):
+    """
+    Same token handling as ClaimsJWTAuthentication, the database is
+    read with the async ORM so the event loop is never blocked
+    """
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        if has_user_claims(validated_token):
+            return self.check_claims(validated_token, await aget_token_version(user_id))
+
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        return user
+
+
+def async_jwt_authenticated(view):
+    """
+    Set request.user from the Authorization header before calling an async view,
+    invalid credentials are answered with 401 the same way DRF does it
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        authenticator = AsyncJWTAuthentication()
+        try:
+            result = await authenticator.aauthenticate(request)
+        except AuthenticationFailed as exc:
+            data = exc.detail if isinstance(exc.detail, dict) else {'detail': exc.detail}
+            response = json_response(data, status=exc.status_code)
+            response['WWW-Authenticate'] = authenticator.authenticate_header(request)
+            return response
+
+        request.user = result[0] if result else AnonymousUser()
+        return await view(request, *args, **kwargs)
+
+    return wrapper
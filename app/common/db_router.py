@@ -0,0 +1,85 @@
+"""
+Read replica routing.
+
+Reads go to a random alias of DATABASE_REPLICAS only inside requests
+that PrimaryPinningMiddleware marked as read only: safe methods from a
+client that has not written recently. Everything else, writes, unsafe
+requests, management commands and background tasks, uses the primary.
+After a write the client gets a short lived cookie pinning its reads to
+the primary, so it reads its own writes (e.g. the rating after a vote)
+while the replicas catch up.
+"""
+import contextlib
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+PRIMARY = 'default'
+PIN_COOKIE = 'pin_primary'
+
+_read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+@contextlib.contextmanager
+def replica_reads(enabled=True):
+    token = _read_from_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _read_from_replica.reset(token)
+
+
+def use_primary():
+    """Read from the primary in this block, e.g. to render data that gets cached"""
+    return replica_reads(False)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        if replicas and _read_from_replica.get():
+            return random.choice(replicas)
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replicas hold the same data as the primary
+        return True
+
+
+class PrimaryPinningMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with replica_reads(self.reads_from_replica(request)):
+            response = self.get_response(request)
+        return self.pin_after_write(request, response)
+
+    async def __acall__(self, request):
+        with replica_reads(self.reads_from_replica(request)):
+            response = await self.get_response(request)
+        return self.pin_after_write(request, response)
+
+    @staticmethod
+    def reads_from_replica(request):
+        return request.method in ('GET', 'HEAD', 'OPTIONS') and PIN_COOKIE not in request.COOKIES
+
+    @staticmethod
+    def pin_after_write(request, response):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400:
+            response.set_cookie(PIN_COOKIE, '1', max_age=getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 5),
+                                httponly=True, samesite='Lax')
+        return response
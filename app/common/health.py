@@ -0,0 +1,32 @@
+"""
+Liveness and readiness probes for the load balancer / orchestrator
+"""
+import logging
+
+from django.db import DatabaseError, connection
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_safe
+
+from .responses import json_response
+
+logger = logging.getLogger(__name__)
+
+
+@never_cache
+@require_safe
+def healthz(request):
+    """The process serves requests"""
+    return json_response({'status': 'ok'})
+
+
+@never_cache
+@require_safe
+def readyz(request):
+    """The process can serve traffic: the database answers"""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except DatabaseError:
+        logger.exception('Readiness check failed')
+        return json_response({'status': 'unavailable', 'database': 'error'}, status=503)
+    return json_response({'status': 'ok', 'database': 'ok'})
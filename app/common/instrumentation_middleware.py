@@ -0,0 +1,146 @@
+"""
+Per request instrumentation: SQL query count, DB time, view and render
+(serialization) time. They are sent back as a Server-Timing header and
+written as one JSON log line, requests running more queries than
+INSTRUMENTATION['QUERY_COUNT_THRESHOLD'] are logged as warnings.
+"""
+import contextlib
+import contextvars
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger('lunch.instrumentation')
+
+
+class QueryStats:
+    """Database execute wrapper that counts queries and their duration"""
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+# QueryStats of the async request being served. The sync views and the
+# async ORM of an ASGI request run in sync_to_async threads on connections
+# of their own, which inherit this context but not execute wrappers added
+# by the middleware
+_request_queries = contextvars.ContextVar('request_queries', default=None)
+
+
+def count_request_queries(execute, sql, params, many, context):
+    queries = _request_queries.get()
+    if queries is None:
+        return execute(sql, params, many, context)
+    return queries(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_query_counter(connection, **kwargs):
+    if count_request_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_request_queries)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = None
+        self.render_started = None
+        self.render_duration = 0.0
+
+    def start_render(self, response):
+        self.render_started = time.perf_counter()
+
+    def finish_render(self, response):
+        self.render_duration = time.perf_counter() - self.render_started
+
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.config().get('ENABLED', True):
+            return self.get_response(request)
+
+        metrics = request._instrumentation = RequestMetrics()
+        metrics.queries = QueryStats()
+        with contextlib.ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics.queries))
+            response = self.get_response(request)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        if not self.config().get('ENABLED', True):
+            return await self.get_response(request)
+
+        metrics = request._instrumentation = RequestMetrics()
+        metrics.queries = QueryStats()
+        token = _request_queries.set(metrics.queries)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        return self.finish(request, response, metrics)
+
+    def process_template_response(self, request, response):
+        metrics = getattr(request, '_instrumentation', None)
+        if metrics is not None:
+            metrics.start_render(response)
+            response.add_post_render_callback(metrics.finish_render)
+        return response
+
+    @staticmethod
+    def config():
+        return getattr(settings, 'INSTRUMENTATION', {})
+
+    def finish(self, request, response, metrics):
+        total = time.perf_counter() - metrics.started
+        view = total - metrics.render_duration
+        timings = []
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+        }
+        if metrics.queries is not None:
+            timings.append(f'db;dur={metrics.queries.duration * 1000:.2f};'
+                           f'desc="{metrics.queries.count} queries"')
+            record.update(queries=metrics.queries.count,
+                          db_ms=round(metrics.queries.duration * 1000, 2))
+        timings += [f'view;dur={view * 1000:.2f}',
+                    f'render;dur={metrics.render_duration * 1000:.2f}',
+                    f'total;dur={total * 1000:.2f}']
+        record.update(view_ms=round(view * 1000, 2),
+                      render_ms=round(metrics.render_duration * 1000, 2),
+                      total_ms=round(total * 1000, 2))
+        response['Server-Timing'] = ', '.join(timings)
+
+        threshold = self.config().get('QUERY_COUNT_THRESHOLD')
+        if threshold is not None and record.get('queries', 0) > threshold:
+            record['query_threshold_exceeded'] = True
+            logger.warning(json.dumps(record))
+        else:
+            logger.info(json.dumps(record))
+        return response
@@ -0,0 +1,24 @@
+from django.db import models
+from django.db.models import F
+
+
+class TableVersionManager(models.Manager):
+    def current(self, model):
+        return self.filter(table=model._meta.label).values_list('version', flat=True).first() or 0
+
+    def bump(self, model):
+        """Count a change of the model's rows, one UPDATE of one row"""
+        label = model._meta.label
+        if not self.filter(table=label).update(version=F('version') + 1):
+            self.bulk_create([self.model(table=label, version=1)], ignore_conflicts=True)
+
+
+class TableVersion(models.Model):
+    """Change counter of a table, the validator of its conditional GETs"""
+    table = models.CharField(max_length=100, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    objects = TableVersionManager()
+
+    def __str__(self):
+        return f'{self.table} v{self.version}'
@@ -0,0 +1,64 @@
+"""
+Keyset (cursor) pagination for the list endpoints, the page is found
+with an indexed range condition instead of OFFSET so its cost does not
+grow with the history size.
+EstimatedCountPaginator keeps the admin changelists of large tables
+from counting every row.
+"""
+from asgiref.sync import sync_to_async
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    async def apaginate_queryset(self, queryset, request):
+        """paginate_queryset for the async views, run by the async ORM executor"""
+        return await sync_to_async(self.paginate_queryset)(queryset, request)
+
+
+class MenuPagination(KeysetPagination):
+    # Newest first, backed by the (date, id) index of Menu
+    ordering = ('-date', '-id')
+
+
+class RestaurantPagination(KeysetPagination):
+    ordering = ('id',)
+
+
+def estimated_row_count(model, using='default'):
+    """Row count of the table from the PostgreSQL planner statistics, None elsewhere"""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                       [connection.ops.quote_name(model._meta.db_table)])
+        row = cursor.fetchone()
+    # -1 until the table has been vacuumed or analyzed
+    return row[0] if row and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Admin paginator: an unfiltered changelist of a table larger than
+    estimate_threshold rows shows the estimated row count instead of
+    running COUNT(*) over the whole table. Filtered lists (search, date
+    hierarchy, filters) are counted exactly.
+    """
+    estimate_threshold = 100_000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > self.estimate_threshold:
+                return estimate
+        return super().count
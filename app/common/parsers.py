@@ -0,0 +1,24 @@
+"""
+CSV request bodies for the bulk endpoints, parsed into a list of row
+dicts keyed by the header line, like a JSON list of objects
+"""
+import csv
+import io
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class CSVParser(BaseParser):
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            # utf-8-sig also drops the BOM spreadsheets put in front
+            text = stream.read().decode('utf-8-sig' if encoding.lower() == 'utf-8' else encoding)
+            return [{key.strip(): value for key, value in row.items() if key}
+                    for row in csv.DictReader(io.StringIO(text))]
+        except (UnicodeDecodeError, csv.Error) as exc:
+            raise ParseError(f'CSV parse error - {exc}')
@@ -3,6 +3,17 @@ Custom permissions to separate employees(users) from restaurant staff
 """
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
+from offices.tenancy import request_office
+
+
+def manages_restaurant(user, restaurant_id):
+    """Ownership check as one indexed EXISTS on (pk, manager_id)"""
+    from restaurants.models import Restaurant
+    try:
+        return Restaurant.objects.filter(pk=restaurant_id, manager_id=user.pk).exists()
+    except (TypeError, ValueError):
+        return False
+
 
 class IsRestaurantStaffOrReadOnly(BasePermission):
     """
@@ -16,15 +27,10 @@ class IsRestaurantStaffOrReadOnly(BasePermission):
         if not request.user.is_authenticated or not request.user.is_restaurant_staff:
             return False
 
-        if view.__class__.__name__ == 'MenuViewSet' and request.method == 'POST':
+        if view.__class__.__name__ == 'MenuViewSet' and getattr(view, 'action', None) == 'create':
             restaurant_id = request.data.get('restaurant')
             if restaurant_id:
-                from restaurants.models import Restaurant
-                try:
-                    restaurant = Restaurant.objects.get(pk=restaurant_id)
-                    return restaurant.manager == request.user
-                except Restaurant.DoesNotExist:
-                    return False
+                return manages_restaurant(request.user, restaurant_id)
 
         return True
 
@@ -35,14 +41,25 @@ class IsRestaurantStaffOrReadOnly(BasePermission):
         if not request.user.is_authenticated or not request.user.is_restaurant_staff:
             return False
 
-        if hasattr(obj, 'manager'):  # Restaurant
-            return obj.manager == request.user
-        elif hasattr(obj, 'restaurant'):  # Menu
-            return obj.restaurant.manager == request.user
+        if hasattr(obj, 'manager_id'):  # Restaurant
+            return obj.manager_id == request.user.pk
+        elif hasattr(obj, 'restaurant_id'):  # Menu
+            return manages_restaurant(request.user, obj.restaurant_id)
 
         return False
 
 
+class IsOfficeMember(BasePermission):
+    """
+    Allow the employees of the request's office, staff can act in any office
+    """
+    def has_permission(self, request, view):
+        user = request.user
+        if not user or not user.is_authenticated:
+            return False
+        return user.is_staff or user.office_id == request_office(request).pk
+
+
 class IsNotRestaurantStaff(BasePermission):
     """
     Allow only employees(users)
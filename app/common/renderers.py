@@ -0,0 +1,33 @@
+"""
+JSON renderer producing the same bytes as DRF's JSONRenderer with orjson,
+it falls back to JSONRenderer when orjson is not installed, when the
+output is not the default compact one (indent, ascii only, ...) or for
+data orjson rejects (non str keys such as the ones of ListField errors,
+integers above 64 bits). Floats in exponent notation are the exception:
+1e16 is written 1e16 rather than 1e+16, the same number.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or not self._is_default_format(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            content = orjson.dumps(data, default=self.encoder_class().default, option=orjson.OPT_UTC_Z)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # JSONRenderer escapes the JavaScript line terminators
+        return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+    def _is_default_format(self, accepted_media_type, renderer_context):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        return indent is None and api_settings.UNICODE_JSON and api_settings.COMPACT_JSON
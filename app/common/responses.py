@@ -0,0 +1,11 @@
+"""
+Helpers for plain Django views that answer like DRF views do
+"""
+from django.http import HttpResponse
+
+from .renderers import ORJSONRenderer
+
+
+def json_response(data, status=200):
+    """Render data with the same JSON renderer as the DRF views"""
+    return HttpResponse(ORJSONRenderer().render(data), status=status, content_type='application/json')
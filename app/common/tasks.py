@@ -0,0 +1,121 @@
+"""
+Background tasks for the side effects of a request that must not delay
+its response (vote tallies, notifications, analytics events).
+
+A function decorated with @task runs when called and is queued with
+.delay(), which submits it once the current transaction commits. The
+executor comes from TASKS['BACKEND']: ThreadPoolBackend runs the tasks
+on a thread pool of the process, ImmediateBackend runs them inline
+(tests, management commands). Failed attempts are retried with an
+exponential backoff and logged.
+
+Queued tasks live in the process memory, tasks pending when the process
+dies are lost, so their effects have to be repairable (see the
+rebuild_vote_counts command for the vote tallies).
+"""
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import close_old_connections, transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+DEFAULT_BACKEND = 'common.tasks.ThreadPoolBackend'
+
+logger = logging.getLogger('lunch.tasks')
+
+
+class ThreadPoolBackend:
+    """Run tasks on a pool of threads of the current process"""
+    def __init__(self, max_workers=4, **options):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tasks')
+
+    def submit(self, job):
+        self._executor.submit(self._run, job)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    @staticmethod
+    def _run(job):
+        # Worker threads get no request signals, honour CONN_MAX_AGE here
+        close_old_connections()
+        try:
+            job()
+        finally:
+            close_old_connections()
+
+
+class ImmediateBackend:
+    """Run tasks inline, in the calling thread"""
+    def __init__(self, **options):
+        pass
+
+    def submit(self, job):
+        job()
+
+    def shutdown(self, wait=True):
+        pass
+
+
+class Task:
+    def __init__(self, func, max_retries, retry_delay):
+        self.func = func
+        self.name = f'{func.__module__}.{func.__qualname__}'
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        functools.update_wrapper(self, func)
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        """Queue the task once the current transaction (if any) commits"""
+        transaction.on_commit(lambda: get_task_backend().submit(
+            functools.partial(self.run, *args, **kwargs)))
+
+    def run(self, *args, **kwargs):
+        """Run with retries, returns whether an attempt succeeded"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.func(*args, **kwargs)
+                return True
+            except Exception:
+                if attempt == self.max_retries:
+                    logger.exception('Task %s failed after %d attempts', self.name, attempt + 1)
+                    return False
+                logger.warning('Task %s failed, retrying (attempt %d)', self.name, attempt + 1, exc_info=True)
+                time.sleep(self.retry_delay * 2 ** attempt)
+
+
+def task(func=None, *, max_retries=3, retry_delay=0.5):
+    """Make a function a background task, retry_delay is in seconds"""
+    if func is None:
+        return functools.partial(task, max_retries=max_retries, retry_delay=retry_delay)
+    return Task(func, max_retries, retry_delay)
+
+
+_task_backend = None
+
+
+def get_task_backend():
+    """Return the process wide executor configured by TASKS"""
+    global _task_backend
+    if _task_backend is None:
+        config = getattr(settings, 'TASKS', {})
+        backend_class = import_string(config.get('BACKEND', DEFAULT_BACKEND))
+        _task_backend = backend_class(**config.get('OPTIONS', {}))
+    return _task_backend
+
+
+@receiver(setting_changed)
+def reset_task_backend(setting, **kwargs):
+    global _task_backend
+    if setting == 'TASKS':
+        if _task_backend is not None:
+            _task_backend.shutdown(wait=False)
+        _task_backend = None
@@ -0,0 +1,68 @@
+"""
+Resolve the office (tenant) of the request from the X-Office header, or
+from the subdomain of OFFICES['DOMAIN'] (acme.lunch.example.com), and
+fall back to the default office. Unknown offices answer 404. The health
+checks (EXEMPT_PATHS) serve every office and skip the lookup.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from offices.tenancy import cached_office, default_office_slug, get_office, is_unknown_office
+from .responses import json_response
+
+OFFICE_HEADER = 'X-Office'
+EXEMPT_PATHS = ('/healthz/', '/readyz/')
+
+
+class TenantMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.path in EXEMPT_PATHS:
+            return self.get_response(request)
+        request.office = get_office(self.office_slug(request))
+        if request.office is None:
+            return self.unknown_office()
+        return self.vary(self.get_response(request))
+
+    async def __acall__(self, request):
+        if request.path in EXEMPT_PATHS:
+            return await self.get_response(request)
+        slug = self.office_slug(request)
+        if is_unknown_office(slug):
+            return self.unknown_office()
+        request.office = cached_office(slug) or await sync_to_async(get_office)(slug)
+        if request.office is None:
+            return self.unknown_office()
+        return self.vary(await self.get_response(request))
+
+    @staticmethod
+    def office_slug(request):
+        slug = request.headers.get(OFFICE_HEADER)
+        if slug:
+            return slug.strip().lower()
+
+        domain = getattr(settings, 'OFFICES', {}).get('DOMAIN')
+        if domain:
+            host = request.get_host().split(':')[0].lower()
+            if host.endswith(f'.{domain}'):
+                return host[:-len(domain) - 1]
+        return default_office_slug()
+
+    @staticmethod
+    def unknown_office():
+        return json_response({'detail': 'Unknown office.'}, status=404)
+
+    @staticmethod
+    def vary(response):
+        patch_vary_headers(response, (OFFICE_HEADER, ))
+        return response
@@ -0,0 +1,390 @@
+import json
+import threading
+from datetime import date
+from unittest import mock
+
+import pytest
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.core.asgi import get_asgi_application
+from django.contrib.auth import get_user_model
+from django.db import OperationalError
+from django.http import HttpResponse
+from django.test import AsyncClient, Client, RequestFactory
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework.test import APIClient
+
+from menus.models import Menu
+from menus.serializers import MenuSerializer
+from restaurants.serializers import RestaurantSerializer
+from .db_router import PIN_COOKIE, PrimaryPinningMiddleware, ReplicaRouter, replica_reads, use_primary
+from .permissions import IsRestaurantStaffOrReadOnly
+from .renderers import ORJSONRenderer
+from .tasks import ThreadPoolBackend, get_task_backend, task
+
+from offices.models import Office
+from restaurants.models import Restaurant
+
+
+@pytest.fixture
+def restaurant():
+    manager = get_user_model().objects.create_user(
+        name='Staff User',
+        email='staff@example.com',
+        password='testpass123',
+        is_restaurant_staff=True
+    )
+    return Restaurant.objects.create(
+        manager=manager,
+        title='Test Restaurant',
+        address='123 Test St',
+        phone_number='+1234567890'
+    )
+
+
+@pytest.mark.django_db
+class TestInstrumentationMiddleware:
+    def test_server_timing_header(self, restaurant):
+        response = APIClient().get('/api/restaurants/')
+        timing = response['Server-Timing']
+        assert 'db;dur=' in timing
+        # The conditional GET version check and the page
+        assert 'desc="2 queries"' in timing
+        for metric in ('view;dur=', 'render;dur=', 'total;dur='):
+            assert metric in timing
+
+    def test_structured_log_line(self, restaurant):
+        with mock.patch('common.instrumentation_middleware.logger') as logger:
+            APIClient().get('/api/restaurants/')
+        record = json.loads(logger.info.call_args.args[0])
+        assert record['path'] == '/api/restaurants/'
+        assert record['status'] == 200
+        assert record['queries'] == 2
+        assert {'db_ms', 'view_ms', 'render_ms', 'total_ms'} <= set(record)
+        logger.warning.assert_not_called()
+
+    def test_query_threshold_flags_request(self, settings, restaurant):
+        settings.INSTRUMENTATION = {'ENABLED': True, 'QUERY_COUNT_THRESHOLD': 0}
+        with mock.patch('common.instrumentation_middleware.logger') as logger:
+            APIClient().get('/api/restaurants/')
+        record = json.loads(logger.warning.call_args.args[0])
+        assert record['query_threshold_exceeded'] is True
+
+    def test_disabled(self, settings, restaurant):
+        settings.INSTRUMENTATION = {'ENABLED': False}
+        response = APIClient().get('/api/restaurants/')
+        assert 'Server-Timing' not in response
+
+    def test_async_request_reports_timings(self, restaurant):
+        response = async_to_sync(AsyncClient().get)('/api/async/restaurants/')
+        assert 'total;dur=' in response['Server-Timing']
+
+    def asgi_get(self, path):
+        """
+        Response headers of a request served by the ASGI handler, as under
+        uvicorn. It queries on connections of its own, hence the transactional tests
+        """
+        async def request():
+            scope = {'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+                     'scheme': 'http', 'path': path, 'query_string': b'', 'headers': [(b'host', b'testserver')],
+                     'server': ('testserver', 80), 'client': ('127.0.0.1', 50000)}
+            communicator = ApplicationCommunicator(get_asgi_application(), scope)
+            await communicator.send_input({'type': 'http.request', 'body': b''})
+            start = await communicator.receive_output(timeout=10)
+            await communicator.receive_output(timeout=10)
+            return {name.decode(): value.decode() for name, value in start['headers']}
+        return async_to_sync(request)()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_asgi_counts_queries_of_sync_views(self, settings, restaurant):
+        settings.INSTRUMENTATION = {'ENABLED': True, 'QUERY_COUNT_THRESHOLD': 1}
+        with mock.patch('common.instrumentation_middleware.logger') as logger:
+            headers = self.asgi_get('/api/restaurants/')
+        assert 'desc="2 queries"' in headers['Server-Timing']
+        assert json.loads(logger.warning.call_args.args[0])['query_threshold_exceeded'] is True
+
+    @pytest.mark.django_db(transaction=True)
+    def test_asgi_counts_queries_of_async_views(self, restaurant):
+        headers = self.asgi_get('/api/async/restaurants/')
+        assert 'db;dur=' in headers['Server-Timing']
+        assert 'desc="0 queries"' not in headers['Server-Timing']
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+    def test_validators_on_list_and_detail(self, restaurant):
+        for url in ('/api/restaurants/', f'/api/restaurants/{restaurant.pk}/'):
+            response = APIClient().get(url)
+            assert response.status_code == 200
+            assert response['ETag'].startswith('W/"')
+            assert 'Last-Modified' not in response
+
+    def test_unchanged_table_is_not_modified(self, restaurant, django_assert_num_queries):
+        etag = APIClient().get('/api/restaurants/')['ETag']
+        with django_assert_num_queries(1):
+            response = APIClient().get('/api/restaurants/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+        assert not response.content
+
+    def test_update_changes_etag(self, restaurant):
+        etag = APIClient().get('/api/restaurants/')['ETag']
+        restaurant.title = 'Renamed'
+        restaurant.save()
+        response = APIClient().get('/api/restaurants/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+    def test_delete_changes_etag(self, restaurant):
+        other = Restaurant.objects.create(manager=restaurant.manager, title='Other',
+                                          address='1 St', phone_number='+1')
+        etag = APIClient().get('/api/restaurants/')['ETag']
+        other.delete()
+        assert APIClient().get('/api/restaurants/', HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    def test_same_second_updates_change_etag(self, restaurant):
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now()):
+            etag = APIClient().get('/api/restaurants/')['ETag']
+            restaurant.title = 'Renamed'
+            restaurant.save()
+            assert APIClient().get('/api/restaurants/', HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    def test_bulk_schedule_changes_etag(self, restaurant):
+        etag = APIClient().get('/api/menus/')['ETag']
+        client = APIClient()
+        client.force_authenticate(restaurant.manager)
+        response = client.post('/api/menus/schedule/', [{'restaurant': restaurant.pk, 'date': str(date.today())}],
+                               format='json')
+        assert response.status_code == 200
+        assert APIClient().get('/api/menus/', HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    def test_etag_depends_on_office(self, restaurant):
+        Office.objects.create(name='Branch', slug='branch')
+        etag = APIClient().get('/api/restaurants/')['ETag']
+        assert APIClient().get('/api/restaurants/', HTTP_X_OFFICE='branch')['ETag'] != etag
+
+    def test_etag_depends_on_query(self, restaurant):
+        etag = APIClient().get('/api/restaurants/')['ETag']
+        assert APIClient().get('/api/restaurants/?page_size=1')['ETag'] != etag
+
+    def test_menu_list(self, restaurant):
+        etag = APIClient().get('/api/menus/')['ETag']
+        assert APIClient().get('/api/menus/', HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+
+class TestORJSONRenderer:
+    def test_same_bytes_as_json_renderer(self):
+        data = {'title': 'Борщ \u2028 "quoted"', 'items': [1, 2.5, None, True], 'nested': {'a': []}}
+        assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_none_renders_empty(self):
+        assert ORJSONRenderer().render(None) == b''
+
+    @pytest.mark.parametrize('data', [{'items': {1: ['Not a valid string.']}}, {'big': 2 ** 70}])
+    def test_rejected_data_falls_back(self, data):
+        assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_indent_falls_back(self):
+        content = ORJSONRenderer().render({'a': 1}, 'application/json; indent=2')
+        assert content == b'{\n  "a": 1\n}'
+
+
+@pytest.mark.django_db
+class TestFastRead:
+    @pytest.fixture
+    def menu(self, restaurant):
+        return Menu.objects.create(restaurant=restaurant, dishes='Вареники, Soup \u2029')
+
+    def test_restaurant_list_matches_serializer(self, restaurant):
+        response = APIClient().get('/api/restaurants/')
+        expected = JSONRenderer().render(RestaurantSerializer([restaurant], many=True).data)
+        assert response.content == b'{"next":null,"previous":null,"results":' + expected + b'}'
+
+    def test_restaurant_detail_matches_serializer(self, restaurant):
+        response = APIClient().get(f'/api/restaurants/{restaurant.pk}/')
+        assert response.content == JSONRenderer().render(RestaurantSerializer(restaurant).data)
+
+    def test_menu_list_matches_serializer(self, menu):
+        response = APIClient().get('/api/menus/')
+        expected = JSONRenderer().render(MenuSerializer([menu], many=True).data)
+        assert response.content == b'{"next":null,"previous":null,"results":' + expected + b'}'
+
+    def test_menu_detail_matches_serializer(self, menu):
+        response = APIClient().get(f'/api/menus/{menu.pk}/')
+        assert response.content == JSONRenderer().render(MenuSerializer(menu).data)
+
+    def test_missing_detail(self):
+        assert APIClient().get('/api/menus/0/').status_code == 404
+        assert APIClient().get('/api/menus/abc/').status_code == 404
+
+
+class MenuViewSet:
+    """Stand-in view, the permission checks the view class name and action"""
+    action = 'create'
+
+
+@pytest.mark.django_db
+class TestIsRestaurantStaffOrReadOnly:
+    @pytest.fixture
+    def other_staff(self):
+        return get_user_model().objects.create_user(email='other@example.com', is_restaurant_staff=True)
+
+    def request(self, user, method='post', data=None):
+        request = Request(getattr(APIRequestFactory(), method)('/', data or {}, format='json'),
+                          parsers=[JSONParser()])
+        request.user = user
+        return request
+
+    def test_menu_create_ownership_is_one_query(self, restaurant, other_staff, django_assert_num_queries):
+        permission = IsRestaurantStaffOrReadOnly()
+        with django_assert_num_queries(1):
+            assert permission.has_permission(self.request(restaurant.manager, data={'restaurant': restaurant.pk}),
+                                             MenuViewSet())
+        with django_assert_num_queries(1):
+            assert not permission.has_permission(self.request(other_staff, data={'restaurant': restaurant.pk}),
+                                                 MenuViewSet())
+
+    def test_invalid_restaurant_id(self, restaurant):
+        request = self.request(restaurant.manager, data={'restaurant': 'abc'})
+        assert not IsRestaurantStaffOrReadOnly().has_permission(request, MenuViewSet())
+
+    def test_restaurant_object_needs_no_query(self, restaurant, other_staff, django_assert_num_queries):
+        permission = IsRestaurantStaffOrReadOnly()
+        manager = restaurant.manager
+        restaurant = Restaurant.objects.get(pk=restaurant.pk)
+        with django_assert_num_queries(0):
+            assert permission.has_object_permission(self.request(manager, 'put'), None, restaurant)
+            assert not permission.has_object_permission(self.request(other_staff, 'put'), None, restaurant)
+
+    def test_menu_object_is_one_query(self, restaurant, other_staff, django_assert_num_queries):
+        permission = IsRestaurantStaffOrReadOnly()
+        menu = Menu.objects.get(pk=Menu.objects.create(restaurant=restaurant, dishes='Soup').pk)
+        with django_assert_num_queries(1):
+            assert permission.has_object_permission(self.request(restaurant.manager, 'put'), None, menu)
+        with django_assert_num_queries(1):
+            assert not permission.has_object_permission(self.request(other_staff, 'delete'), None, menu)
+
+
+@pytest.mark.django_db
+class TestHealthChecks:
+    def test_healthz(self):
+        response = Client().get('/healthz/')
+        assert response.status_code == 200
+        assert json.loads(response.content) == {'status': 'ok'}
+        assert 'no-cache' in response['Cache-Control']
+
+    def test_readyz(self):
+        response = Client().get('/readyz/')
+        assert response.status_code == 200
+        assert json.loads(response.content) == {'status': 'ok', 'database': 'ok'}
+
+    def test_readyz_database_down(self):
+        with mock.patch('common.health.connection.cursor', side_effect=OperationalError('down')):
+            response = Client().get('/readyz/')
+        assert response.status_code == 503
+        assert json.loads(response.content)['status'] == 'unavailable'
+
+    def test_safe_methods_only(self):
+        assert Client().post('/healthz/').status_code == 405
+
+
+class TestTasks:
+    @pytest.fixture(autouse=True)
+    def immediate_tasks(self, settings):
+        settings.TASKS = {'BACKEND': 'common.tasks.ImmediateBackend'}
+
+    def test_retries_until_success(self):
+        attempts = []
+
+        @task(max_retries=2, retry_delay=0)
+        def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise RuntimeError('boom')
+
+        with mock.patch('common.tasks.logger') as logger:
+            assert flaky.run() is True
+        assert len(attempts) == 3
+        assert logger.warning.call_count == 2
+
+    def test_gives_up_after_max_retries(self):
+        failing = task(mock.Mock(side_effect=RuntimeError('boom'), __name__='failing', __qualname__='failing'),
+                       max_retries=1, retry_delay=0)
+        with mock.patch('common.tasks.logger') as logger:
+            assert failing.run() is False
+        assert failing.func.call_count == 2
+        logger.exception.assert_called_once()
+
+    @pytest.mark.django_db
+    def test_delay_waits_for_commit(self, django_capture_on_commit_callbacks):
+        calls = []
+        record = task(calls.append)
+        with django_capture_on_commit_callbacks(execute=True):
+            record.delay('vote')
+            assert calls == []
+        assert calls == ['vote']
+
+    def test_thread_pool_backend(self, settings):
+        settings.TASKS = {'BACKEND': 'common.tasks.ThreadPoolBackend', 'OPTIONS': {'max_workers': 2}}
+        backend = get_task_backend()
+        assert isinstance(backend, ThreadPoolBackend)
+        done = threading.Event()
+        backend.submit(done.set)
+        assert done.wait(timeout=5)
+
+
+class TestReplicaRouting:
+    @pytest.fixture(autouse=True)
+    def replicas(self, settings):
+        settings.DATABASE_REPLICAS = ['replica_1']
+
+    def routed_read(self, request):
+        """Run a request through the middleware, return where a read goes"""
+        seen = []
+
+        def view(request):
+            seen.append(ReplicaRouter().db_for_read(Menu))
+            return HttpResponse(status=201 if request.method == 'POST' else 200)
+
+        response = PrimaryPinningMiddleware(view)(request)
+        return seen[0], response
+
+    def test_outside_requests_use_primary(self):
+        assert ReplicaRouter().db_for_read(Menu) == 'default'
+        assert ReplicaRouter().db_for_write(Menu) == 'default'
+
+    def test_safe_request_reads_replica(self):
+        db, response = self.routed_read(RequestFactory().get('/api/menus/'))
+        assert db == 'replica_1'
+        assert PIN_COOKIE not in response.cookies
+
+    def test_write_pins_client_to_primary(self, settings):
+        settings.DATABASE_REPLICA_PIN_SECONDS = 7
+        db, response = self.routed_read(RequestFactory().post('/api/menus/vote/'))
+        assert db == 'default'
+        assert response.cookies[PIN_COOKIE]['max-age'] == 7
+
+        request = RequestFactory().get('/api/menus/today_rating/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        assert self.routed_read(request)[0] == 'default'
+
+    def test_use_primary_block(self):
+        with replica_reads():
+            with use_primary():
+                assert ReplicaRouter().db_for_read(Menu) == 'default'
+            assert ReplicaRouter().db_for_read(Menu) == 'replica_1'
+
+    def test_without_replicas(self, settings):
+        settings.DATABASE_REPLICAS = []
+        assert self.routed_read(RequestFactory().get('/api/menus/'))[0] == 'default'
+
+    def test_async_request(self):
+        async def view(request):
+            return HttpResponse(ReplicaRouter().db_for_read(Menu))
+
+        response = async_to_sync(PrimaryPinningMiddleware(view))(RequestFactory().get('/api/async/menus/'))
+        assert response.content == b'replica_1'
@@ -1,11 +1,23 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 
 
 class VersionControlMiddleware:
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        app_version = request.headers.get('X-App-Version', '0.0.0')
-        request.app_version = app_version
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.app_version = request.headers.get('X-App-Version', '0.0.0')
         response = self.get_response(request)
         return response
+
+    async def __acall__(self, request):
+        request.app_version = request.headers.get('X-App-Version', '0.0.0')
+        response = await self.get_response(request)
+        return response
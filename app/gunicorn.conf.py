@@ -0,0 +1,32 @@
+"""
+Gunicorn settings for production, run from this directory:
+
+    gunicorn app.asgi:application -c gunicorn.conf.py
+
+Uvicorn workers serve the ASGI application, the async views and the
+Server-Sent Events stream run natively, the DRF views in a thread each.
+Every setting can be overridden with a GUNICORN_* environment variable.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+worker_class = 'uvicorn_worker.UvicornWorker'
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+
+# Import Django once in the master and fork the workers from it: faster
+# boots and shared memory pages. Code changes then need a new master
+# (USR2 + QUIT), HUP only restarts the workers.
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+# Restart workers now and then to cap memory growth, staggered by the jitter
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 1000))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+# Time left to in-flight requests on reload/shutdown
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
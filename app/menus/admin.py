@@ -1,15 +1,94 @@
+from datetime import timedelta
+
 from django.contrib import admin
-from .models import Menu, MenuVote
+from django.utils import timezone
+
+from common.pagination import EstimatedCountPaginator
+from .models import DailyResult, Dish, Menu, MenuVote, MenuVoteArchive
+
+
+class RecentDateFilter(admin.SimpleListFilter):
+    """
+    Today, this week or this month as one indexed range lookup on `field`.
+    Stands in for date_hierarchy, whose drill-down links run a SELECT
+    DISTINCT over the dates of the whole table
+    """
+    title = 'date'
+    parameter_name = 'period'
+    field = None
+
+    def lookups(self, request, model_admin):
+        return (('today', 'Today'), ('week', 'This week'), ('month', 'This month'))
+
+    def queryset(self, request, queryset):
+        today = timezone.localdate()
+        if self.value() == 'today':
+            start, end = today, today
+        elif self.value() == 'week':
+            start = today - timedelta(days=today.weekday())
+            end = start + timedelta(days=6)
+        elif self.value() == 'month':
+            start = today.replace(day=1)
+            end = (start + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+        else:
+            return queryset
+        return queryset.filter(**{f'{self.field}__range': (start, end)})
+
+
+class VoteDateFilter(RecentDateFilter):
+    field = 'created_at'
+
+
+class MenuDateFilter(RecentDateFilter):
+    field = 'date'
 
 
 class MenuVoteAdmin(admin.ModelAdmin):
     list_display = ('menu', 'user', 'created_at')
+    # Menu.__str__ shows the restaurant title, MenuVote.__str__ the user email
+    list_select_related = ('menu__restaurant', 'user')
+    list_filter = (VoteDateFilter, )
+    autocomplete_fields = ('menu', 'user')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class MenuVoteArchiveAdmin(MenuVoteAdmin):
+    pass
 
 
 class MenuAdmin(admin.ModelAdmin):
-    list_display = ('restaurant', 'date')
-    list_filter = ('date', )
+    list_display = ('restaurant', 'date', 'vote_count')
+    list_select_related = ('restaurant', )
+    list_filter = ('office', MenuDateFilter)
+    search_fields = ('restaurant__title', )
+    autocomplete_fields = ('restaurant', 'dish_items')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class DishAdmin(admin.ModelAdmin):
+    list_display = ('name', )
+    search_fields = ('name', )
+
+
+class DailyResultAdmin(admin.ModelAdmin):
+    list_display = ('date', 'office', 'restaurant', 'votes', 'finalized_at')
+    list_select_related = ('office', 'restaurant')
+    list_filter = ('office', )
+    date_hierarchy = 'date'
+    readonly_fields = ('office', 'date', 'menu', 'restaurant', 'votes', 'ranking', 'finalized_at')
+
+    # Results are written once by the finalize_days command
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 
 admin.site.register(MenuVote, MenuVoteAdmin)
+admin.site.register(MenuVoteArchive, MenuVoteArchiveAdmin)
 admin.site.register(Menu, MenuAdmin)
+admin.site.register(Dish, DishAdmin)
+admin.site.register(DailyResult, DailyResultAdmin)
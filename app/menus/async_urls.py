@@ -0,0 +1,13 @@
+from django.urls import path
+from . import async_views
+
+app_name = 'menus_async'
+
+
+urlpatterns = [
+    path('', async_views.menu_list, name='menus'),
+    path('<int:pk>/', async_views.menu_detail, name='menu-detail'),
+    path('today_menu/', async_views.today_menu, name='today-menu'),
+    path('today_rating/', async_views.today_rating, name='today-rating'),
+    path('today_rating/stream/', async_views.today_rating_stream, name='today-rating-stream'),
+]
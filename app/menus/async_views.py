@@ -0,0 +1,127 @@
+"""
+ASGI native read endpoints for menus, they mirror the GET actions of
+MenuViewSet but use the async ORM instead of a thread per request.
+today_rating_stream is the live ranking (Server-Sent Events), it needs ASGI
+"""
+import asyncio
+import json
+from datetime import date
+
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+
+from common.authentication import async_jwt_authenticated
+from common.db_router import use_primary
+from common.pagination import MenuPagination
+from common.renderers import ORJSONRenderer
+from common.responses import json_response
+from offices.tenancy import arequest_office
+from .cache import get_ranking_cache
+from .events import get_ranking_hub
+from .filters import MenuFilter
+from .models import Menu
+from .serializers import MenuSerializer
+
+
+def today_menus(office_id):
+    return Menu.objects.filter(office_id=office_id, date=date.today()).order_by('-vote_count', 'id')
+
+
+@require_safe
+@async_jwt_authenticated
+async def menu_list(request):
+    request = Request(request)
+    paginator = MenuPagination()
+    office = await arequest_office(request)
+    try:
+        menus = MenuFilter().filter_queryset(request, Menu.objects.filter(office=office), None)
+        page = await paginator.apaginate_queryset(menus, request)
+    except APIException as exc:
+        return json_response(exc.detail, status=exc.status_code)
+
+    serializer = MenuSerializer(page, many=True)
+    return json_response(paginator.get_paginated_response(serializer.data).data)
+
+
+@require_safe
+@async_jwt_authenticated
+async def menu_detail(request, pk):
+    try:
+        menu = await Menu.objects.aget(pk=pk, office=await arequest_office(request))
+    except Menu.DoesNotExist:
+        # The body of the sync view's 404
+        return json_response({'detail': 'No Menu matches the given query.'}, status=404)
+    return json_response(MenuSerializer(menu).data)
+
+
+@require_safe
+@async_jwt_authenticated
+async def today_menu(request):
+    office = await arequest_office(request)
+
+    async def render():
+        menu = await today_menus(office.pk).afirst()
+        return ORJSONRenderer().render(MenuSerializer(menu).data)
+
+    with use_primary():
+        content = await get_ranking_cache().aget_or_render('today_menu', office.pk, date.today(), render)
+    return HttpResponse(content, content_type='application/json')
+
+
+async def render_today_rating(office_id):
+    async def render():
+        menus = [menu async for menu in today_menus(office_id).aiterator()]
+        return ORJSONRenderer().render(MenuSerializer(menus, many=True).data)
+
+    with use_primary():
+        return await get_ranking_cache().aget_or_render('today_rating', office_id, date.today(), render)
+
+
+@require_safe
+@async_jwt_authenticated
+async def today_rating(request):
+    office = await arequest_office(request)
+    return HttpResponse(await render_today_rating(office.pk), content_type='application/json')
+
+
+@require_safe
+@async_jwt_authenticated
+async def today_rating_stream(request):
+    """
+    Sends the today's rating of the office as a `snapshot` event, then a `vote`
+    event {"office": id, "menu": id, "date": "YYYY-MM-DD", "vote_count": n}
+    with the new tally of a menu of the office that got votes.
+    A new snapshot is sent if the client could not keep up
+    """
+    keepalive = getattr(settings, 'MENU_EVENTS', {}).get('KEEPALIVE', 15)
+    office = await arequest_office(request)
+
+    async def events():
+        async with get_ranking_hub().subscribe() as subscription:
+            yield sse_event('snapshot', await render_today_rating(office.pk))
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+
+                if subscription.overflowed:
+                    subscription.drain()
+                    yield sse_event('snapshot', await render_today_rating(office.pk))
+                elif message['office'] == office.pk and message['date'] == date.today().isoformat():
+                    yield sse_event('vote', json.dumps(message))
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def sse_event(name, data):
+    if isinstance(data, bytes):
+        data = data.decode()
+    return f'event: {name}\ndata: {data}\n\n'
@@ -0,0 +1,169 @@
+"""
+Cache for the rendered today_menu/today_rating responses.
+
+Responses are stored as already rendered JSON bytes per office and date, so a hit
+skips both the database and serialization. Entries are dropped by the
+signal handlers in menus.signals whenever a menu or a vote changes.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+DEFAULT_BACKEND = 'menus.cache.LocMemBackend'
+RANKING_KINDS = ('today_menu', 'today_rating')
+
+
+class LocMemBackend:
+    """
+    Process local storage, every worker keeps its own copy. Invalidations
+    only reach the worker that handled the change, the copies of the other
+    workers are stale for at most `timeout` seconds.
+    """
+    def __init__(self, timeout=5, **options):
+        self.timeout = timeout
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires is not None and expires <= time.monotonic():
+            with self._lock:
+                if self._data.get(key) is entry:
+                    del self._data[key]
+            return None
+        return value
+
+    def set(self, key, value):
+        expires = None if self.timeout is None else time.monotonic() + self.timeout
+        with self._lock:
+            self._data[key] = (expires, value)
+
+    async def aget(self, key):
+        return self.get(key)
+
+    async def aset(self, key, value):
+        self.set(key, value)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class DjangoCacheBackend:
+    """Storage shared between workers through a Django cache alias"""
+    def __init__(self, alias='default', timeout=None, **options):
+        self.cache = caches[alias]
+        self.timeout = timeout
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value):
+        self.cache.set(key, value, self.timeout)
+
+    async def aget(self, key):
+        return await self.cache.aget(key)
+
+    async def aset(self, key, value):
+        await self.cache.aset(key, value, self.timeout)
+
+    def delete_many(self, keys):
+        self.cache.delete_many(keys)
+
+    def clear(self):
+        self.cache.clear()
+
+
+class RankingCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(kind, office_id, day):
+        return f'menus:{kind}:{office_id}:{day.isoformat()}'
+
+    def get_or_render(self, kind, office_id, day, render):
+        """Return cached bytes for the office and day or store the result of render()"""
+        key = self.make_key(kind, office_id, day)
+        content = self.backend.get(key)
+        if content is not None:
+            self._count(hit=True)
+            return content
+
+        self._count(hit=False)
+        content = render()
+        self.backend.set(key, content)
+        return content
+
+    async def aget_or_render(self, kind, office_id, day, arender):
+        """Async variant of get_or_render, arender is a coroutine function"""
+        key = self.make_key(kind, office_id, day)
+        content = await self.backend.aget(key)
+        if content is not None:
+            self._count(hit=True)
+            return content
+
+        self._count(hit=False)
+        content = await arender()
+        await self.backend.aset(key, content)
+        return content
+
+    def invalidate(self, office_id, day):
+        self.backend.delete_many([self.make_key(kind, office_id, day) for kind in RANKING_KINDS])
+
+    def clear(self):
+        self.backend.clear()
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'backend': f'{type(self.backend).__module__}.{type(self.backend).__name__}',
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+_ranking_cache = None
+
+
+def get_ranking_cache():
+    """Return the process wide cache configured by MENU_RANKING_CACHE"""
+    global _ranking_cache
+    if _ranking_cache is None:
+        config = getattr(settings, 'MENU_RANKING_CACHE', {})
+        backend_class = import_string(config.get('BACKEND', DEFAULT_BACKEND))
+        _ranking_cache = RankingCache(backend_class(**config.get('OPTIONS', {})))
+    return _ranking_cache
+
+
+@receiver(setting_changed)
+def reset_ranking_cache(setting, **kwargs):
+    global _ranking_cache
+    if setting in ('MENU_RANKING_CACHE', 'CACHES'):
+        _ranking_cache = None
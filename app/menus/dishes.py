@@ -0,0 +1,21 @@
+"""
+Parsing of the free-form Menu.dishes text into dish names
+"""
+import re
+
+DISH_SEPARATORS = re.compile(r'[,;\n]')
+
+
+def parse_dishes(text):
+    """
+    Split the menu text into dish names, whitespace is collapsed and
+    case-insensitive duplicates dropped keeping the first spelling
+    """
+    names = []
+    seen = set()
+    for part in DISH_SEPARATORS.split(text or ''):
+        name = ' '.join(part.split())[:255]
+        if name and name.lower() not in seen:
+            seen.add(name.lower())
+            names.append(name)
+    return names
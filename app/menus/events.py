@@ -0,0 +1,140 @@
+"""
+Fan-out of vote events to the live ranking streams.
+
+Every process keeps a RankingHub whose subscribers are the open stream
+connections. Events are published through a broker: LocalBroker delivers
+them inside the process, RedisBroker goes through Redis pub/sub so votes
+recorded by any worker reach the streams of every worker.
+"""
+import asyncio
+import contextlib
+import json
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+DEFAULT_BROKER = 'menus.events.LocalBroker'
+CHANNEL = 'menus:votes'
+
+
+class LocalBroker:
+    """In process pub/sub, also the stand-in for Redis in tests"""
+    def __init__(self, **options):
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def publish(self, message):
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(message)
+
+    def add_listener(self, listener):
+        with self._lock:
+            self._listeners.append(listener)
+
+
+class RedisBroker(LocalBroker):
+    """Relays messages through a Redis channel, requires the redis package"""
+    def __init__(self, url, channel=CHANNEL, **options):
+        super().__init__()
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured('RedisBroker requires the redis package')
+        self.channel = channel
+        self.client = redis.Redis.from_url(url)
+        self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{channel: self._receive})
+        self._pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+    def publish(self, message):
+        self.client.publish(self.channel, json.dumps(message))
+
+    def _receive(self, raw):
+        super().publish(json.loads(raw['data']))
+
+
+class Subscription:
+    def __init__(self, loop, maxsize):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def deliver(self, message):
+        """Called from any thread, hands the message to the event loop"""
+        self.loop.call_soon_threadsafe(self._put, message)
+
+    def drain(self):
+        """Drop the queued messages, used before sending a new snapshot"""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.overflowed = False
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # The client is too slow, it gets a fresh snapshot instead
+            self.overflowed = True
+
+
+class RankingHub:
+    def __init__(self, broker, queue_size=100):
+        self.broker = broker
+        self.queue_size = queue_size
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        broker.add_listener(self._dispatch)
+
+    def publish_tallies(self, office_id, menus):
+        """
+        menus are the {'id', 'date', 'vote_count'} of the menus of the office that got
+        votes. The absolute tallies let clients apply an event twice, or one
+        already counted by their snapshot, without drifting
+        """
+        for menu in menus:
+            self.broker.publish({'office': office_id, 'menu': menu['id'], 'date': menu['date'].isoformat(),
+                                 'vote_count': menu['vote_count']})
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self):
+        subscription = Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                self._subscriptions.discard(subscription)
+
+    def _dispatch(self, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription.deliver(message)
+
+
+_ranking_hub = None
+
+
+def get_ranking_hub():
+    """Return the process wide hub on the broker configured by MENU_EVENTS"""
+    global _ranking_hub
+    if _ranking_hub is None:
+        config = getattr(settings, 'MENU_EVENTS', {})
+        broker_class = import_string(config.get('BROKER', DEFAULT_BROKER))
+        _ranking_hub = RankingHub(broker_class(**config.get('OPTIONS', {})),
+                                  queue_size=config.get('QUEUE_SIZE', 100))
+    return _ranking_hub
+
+
+@receiver(setting_changed)
+def reset_ranking_hub(setting, **kwargs):
+    global _ranking_hub
+    if setting == 'MENU_EVENTS':
+        _ranking_hub = None
@@ -0,0 +1,35 @@
+"""
+Query parameter filters for menu lists
+"""
+from datetime import date
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+class MenuFilter(BaseFilterBackend):
+    """
+    ?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD&restaurant=<id>,
+    both date bounds are inclusive
+    """
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+
+        if params.get('date_from'):
+            queryset = queryset.filter(date__gte=self.parse_date(params, 'date_from'))
+        if params.get('date_to'):
+            queryset = queryset.filter(date__lte=self.parse_date(params, 'date_to'))
+        if params.get('restaurant'):
+            try:
+                queryset = queryset.filter(restaurant_id=int(params['restaurant']))
+            except ValueError:
+                raise ValidationError({'restaurant': 'Must be an integer.'})
+
+        return queryset
+
+    @staticmethod
+    def parse_date(params, name):
+        try:
+            return date.fromisoformat(params[name])
+        except ValueError:
+            raise ValidationError({name: 'Must be a date in YYYY-MM-DD format.'})
@@ -0,0 +1,40 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from menus.models import DailyResult, Menu
+from menus.voting import last_closed_day
+from offices.models import Office
+
+
+class Command(BaseCommand):
+    help = ('Freeze the ranking of every closed day (voting cutoff passed) '
+            'into a DailyResult, run it on a schedule after MENU_VOTING_CUTOFF')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=date.fromisoformat,
+                            help='Finalize only this day (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        closed = last_closed_day()
+        if options['date'] and options['date'] > closed:
+            raise CommandError(f'Voting for {options["date"]} is still open')
+
+        finalized = 0
+        for office in Office.objects.order_by('pk'):
+            if options['date']:
+                days = [options['date']]
+            else:
+                days = (Menu.objects
+                        .filter(office=office, date__lte=closed)
+                        .exclude(date__in=DailyResult.objects.filter(office=office).values('date'))
+                        .order_by('date')
+                        .values_list('date', flat=True)
+                        .distinct())
+
+            for day in days:
+                result = DailyResult.objects.finalize(day, office.pk)
+                if result is not None:
+                    finalized += 1
+                    self.stdout.write(f'{office.slug} {day}: menu {result.menu_id} won with {result.votes} votes')
+        self.stdout.write(self.style.SUCCESS(f'Finalized {finalized} days'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from menus.models import Menu
+
+
+class Command(BaseCommand):
+    help = 'Rebuild denormalized menu vote tallies from MenuVote rows'
+
+    def handle(self, *args, **options):
+        updated = Menu.objects.rebuild_vote_counts()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt vote tallies for {updated} menus'))
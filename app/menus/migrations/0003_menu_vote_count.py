@@ -0,0 +1,37 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:45
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_vote_count(apps, schema_editor):
+    Menu = apps.get_model('menus', 'Menu')
+    MenuVote = apps.get_model('menus', 'MenuVote')
+    votes = (MenuVote.objects
+             .filter(menu=OuterRef('pk'))
+             .values('menu')
+             .annotate(total=Count('pk'))
+             .values('total'))
+    Menu.objects.update(vote_count=Coalesce(Subquery(votes), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menus', '0002_menu_dishes'),
+        ('restaurants', '0002_remove_menuvote_menu_remove_menuvote_user_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='menu',
+            name='vote_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='menu',
+            index=models.Index(fields=['date', '-vote_count'], name='menu_date_vote_count_idx'),
+        ),
+        migrations.RunPython(backfill_vote_count, migrations.RunPython.noop),
+    ]
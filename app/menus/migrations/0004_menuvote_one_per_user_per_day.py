@@ -0,0 +1,46 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:48
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def remove_duplicate_votes(apps, schema_editor):
+    """Keep the earliest vote of each user and day, then recount the menus that lost votes"""
+    Menu = apps.get_model('menus', 'Menu')
+    MenuVote = apps.get_model('menus', 'MenuVote')
+    duplicates = list(MenuVote.objects
+                      .values('user', 'created_at')
+                      .annotate(first=Min('pk'), votes=Count('pk'))
+                      .filter(votes__gt=1))
+    menu_ids = set()
+    for group in duplicates:
+        extra = (MenuVote.objects
+                 .filter(user=group['user'], created_at=group['created_at'])
+                 .exclude(pk=group['first']))
+        menu_ids.update(extra.values_list('menu', flat=True))
+        extra.delete()
+
+    votes = (MenuVote.objects
+             .filter(menu=OuterRef('pk'))
+             .values('menu')
+             .annotate(total=Count('pk'))
+             .values('total'))
+    Menu.objects.filter(pk__in=menu_ids).update(vote_count=Coalesce(Subquery(votes), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menus', '0003_menu_vote_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_votes, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='menuvote',
+            constraint=models.UniqueConstraint(fields=('user', 'created_at'), name='menu_vote_one_per_user_per_day'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menus', '0004_menuvote_one_per_user_per_day'),
+        ('restaurants', '0002_remove_menuvote_menu_remove_menuvote_user_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='menu',
+            index=models.Index(fields=['date', 'id'], name='menu_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:59
+
+import re
+
+import django.db.models.functions.text
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+
+DISH_SEPARATORS = re.compile(r'[,;\n]')
+SEARCH_INDEX = GinIndex(SearchVector('name', config='simple'), name='dish_name_search_idx')
+
+
+def parse_dishes(text):
+    names = []
+    seen = set()
+    for part in DISH_SEPARATORS.split(text or ''):
+        name = ' '.join(part.split())[:255]
+        if name and name.lower() not in seen:
+            seen.add(name.lower())
+            names.append(name)
+    return names
+
+
+def split_menu_dishes(apps, schema_editor):
+    Menu = apps.get_model('menus', 'Menu')
+    Dish = apps.get_model('menus', 'Dish')
+    Link = Menu.dish_items.through
+
+    names_by_menu = {menu_id: parse_dishes(text)
+                     for menu_id, text in Menu.objects.values_list('pk', 'dishes').iterator()}
+    names = {name.lower(): name for names in names_by_menu.values() for name in names}
+    Dish.objects.bulk_create([Dish(name=name) for name in names.values()],
+                             batch_size=1000, ignore_conflicts=True)
+    # The table is new, every row is one of these. Lowered in Python,
+    # SQLite's LOWER() only folds ASCII letters
+    dish_ids = {name.lower(): pk for name, pk in Dish.objects.values_list('name', 'pk').iterator()}
+    Link.objects.bulk_create([
+        Link(menu_id=menu_id, dish_id=dish_ids[name.lower()])
+        for menu_id, menu_names in names_by_menu.items()
+        for name in menu_names
+    ], batch_size=1000)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.add_index(apps.get_model('menus', 'Dish'), SEARCH_INDEX)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.remove_index(apps.get_model('menus', 'Dish'), SEARCH_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menus', '0005_menu_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Dish',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(django.db.models.functions.text.Lower('name'), name='dish_name_ci_unique')],
+            },
+        ),
+        migrations.AddField(
+            model_name='menu',
+            name='dish_items',
+            field=models.ManyToManyField(blank=True, related_name='menus', to='menus.dish'),
+        ),
+        migrations.RunPython(split_menu_dishes, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menus', '0006_dish'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='menuvote',
+            index=models.Index(fields=['created_at'], name='menu_vote_created_at_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+HISTORY_VIEW = """
+CREATE VIEW menus_menuvote_history AS
+SELECT id, menu_id, user_id, created_at FROM menus_menuvote
+UNION ALL
+SELECT id, menu_id, user_id, created_at FROM menus_menuvotearchive
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menus', '0007_menuvote_created_at_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MenuVoteHistory',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('created_at', models.DateField()),
+            ],
+            options={
+                'db_table': 'menus_menuvote_history',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='MenuVoteArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('created_at', models.DateField()),
+                ('menu', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_votes', to='menus.menu')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at'], name='menu_vote_archive_date_idx')],
+            },
+        ),
+        migrations.RunSQL(HISTORY_VIEW, 'DROP VIEW menus_menuvote_history'),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menus', '0008_menuvotearchive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='menu',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
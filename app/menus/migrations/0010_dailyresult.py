@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menus', '0009_menu_updated_at'),
+        ('restaurants', '0003_restaurant_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('votes', models.PositiveIntegerField(default=0)),
+                ('ranking', models.JSONField(default=list)),
+                ('finalized_at', models.DateTimeField(auto_now_add=True)),
+                ('menu', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='menus.menu')),
+                ('restaurant', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='daily_wins', to='restaurants.restaurant')),
+            ],
+        ),
+    ]
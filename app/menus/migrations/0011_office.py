@@ -0,0 +1,104 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+from offices.tenancy import default_office_slug
+
+# SQLite rebuilds menus_menuvote to alter it, which fails while the
+# history view (0008_menuvotearchive) refers to the table
+HISTORY_VIEW = """
+CREATE VIEW menus_menuvote_history AS
+SELECT id, menu_id, user_id, created_at FROM menus_menuvote
+UNION ALL
+SELECT id, menu_id, user_id, created_at FROM menus_menuvotearchive
+"""
+
+
+def copy_offices(apps, schema_editor):
+    """Menus take the office of their restaurant, votes the one of their menu"""
+    Office = apps.get_model('offices', 'Office')
+    Restaurant = apps.get_model('restaurants', 'Restaurant')
+    Menu = apps.get_model('menus', 'Menu')
+    MenuVote = apps.get_model('menus', 'MenuVote')
+    DailyResult = apps.get_model('menus', 'DailyResult')
+
+    Menu.objects.update(office=Subquery(
+        Restaurant.objects.filter(pk=OuterRef('restaurant')).values('office')[:1]))
+    MenuVote.objects.update(office=Subquery(
+        Menu.objects.filter(pk=OuterRef('menu')).values('office')[:1]))
+    if DailyResult.objects.exists():
+        slug = default_office_slug()
+        office, _ = Office.objects.get_or_create(slug=slug, defaults={'name': slug.title()})
+        DailyResult.objects.update(office=office)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menus', '0010_dailyresult'),
+        ('offices', '0001_initial'),
+        ('restaurants', '0004_restaurant_office'),
+    ]
+
+    operations = [
+        migrations.RunSQL('DROP VIEW menus_menuvote_history', HISTORY_VIEW),
+        migrations.AddField(
+            model_name='menu',
+            name='office',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='menus', to='offices.office'),
+        ),
+        migrations.AddField(
+            model_name='menuvote',
+            name='office',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='offices.office'),
+        ),
+        migrations.AddField(
+            model_name='dailyresult',
+            name='office',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='offices.office'),
+        ),
+        migrations.RunPython(copy_offices, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='menu',
+            name='office',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='menus', to='offices.office'),
+        ),
+        migrations.AlterField(
+            model_name='menuvote',
+            name='office',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='offices.office'),
+        ),
+        migrations.AlterField(
+            model_name='dailyresult',
+            name='office',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='offices.office'),
+        ),
+        migrations.AlterField(
+            model_name='dailyresult',
+            name='date',
+            field=models.DateField(),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyresult',
+            constraint=models.UniqueConstraint(fields=('office', 'date'), name='daily_result_one_per_office_day'),
+        ),
+        migrations.RemoveIndex(
+            model_name='menu',
+            name='menu_date_vote_count_idx',
+        ),
+        migrations.AddIndex(
+            model_name='menu',
+            index=models.Index(fields=['office', 'date', '-vote_count'], name='menu_office_date_votes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menu',
+            index=models.Index(fields=['office', 'date', 'id'], name='menu_office_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menuvote',
+            index=models.Index(fields=['office', 'created_at'], name='menu_vote_office_date_idx'),
+        ),
+        migrations.RunSQL(HISTORY_VIEW, 'DROP VIEW menus_menuvote_history'),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:10
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menus', '0011_office'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='menu',
+            name='date',
+            field=models.DateField(default=datetime.date.today),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.1.6 on 2026-10-18 23:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+# SQLite rebuilds menus_menuvotearchive to alter it, which fails while the
+# history view refers to the table
+OLD_HISTORY_VIEW = """
+CREATE VIEW menus_menuvote_history AS
+SELECT id, menu_id, user_id, created_at FROM menus_menuvote
+UNION ALL
+SELECT id, menu_id, user_id, created_at FROM menus_menuvotearchive
+"""
+HISTORY_VIEW = """
+CREATE VIEW menus_menuvote_history AS
+SELECT id, menu_id, user_id, office_id, created_at FROM menus_menuvote
+UNION ALL
+SELECT id, menu_id, user_id, office_id, created_at FROM menus_menuvotearchive
+"""
+
+
+def copy_offices(apps, schema_editor):
+    """Archived votes take the office of their menu"""
+    Menu = apps.get_model('menus', 'Menu')
+    MenuVoteArchive = apps.get_model('menus', 'MenuVoteArchive')
+    MenuVoteArchive.objects.update(office=Subquery(
+        Menu.objects.filter(pk=OuterRef('menu')).values('office')[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menus', '0013_alter_menu_updated_at'),
+        ('offices', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunSQL('DROP VIEW menus_menuvote_history', OLD_HISTORY_VIEW),
+        migrations.AddField(
+            model_name='menuvotearchive',
+            name='office',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='offices.office'),
+        ),
+        migrations.RunPython(copy_offices, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='menuvotearchive',
+            name='office',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='offices.office'),
+        ),
+        migrations.AddIndex(
+            model_name='menuvotearchive',
+            index=models.Index(fields=['office', 'created_at'], name='menu_vote_archive_office_idx'),
+        ),
+        migrations.AddField(
+            model_name='menuvotehistory',
+            name='office',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='offices.office'),
+        ),
+        migrations.RunSQL(HISTORY_VIEW, 'DROP VIEW menus_menuvote_history'),
+    ]
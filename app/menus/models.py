@@ -1,22 +1,229 @@
-from django.db import models
+from datetime import date
+
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import IntegrityError, connections, models, router, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Lower
 from django.conf import settings
 
+from offices.tenancy import default_office_id
 from restaurants.models import Restaurant
+from .dishes import parse_dishes
+from .voting import is_voting_open
+
+DISH_SEARCH_CONFIG = 'simple'
+
+
+class DishManager(models.Manager):
+
+    def search(self, query):
+        """
+        Full-text search on Postgres (GIN index on the name search vector),
+        case-insensitive substring match of every word on other databases
+        """
+        if connections[self.db].vendor == 'postgresql':
+            return (self.annotate(search=SearchVector('name', config=DISH_SEARCH_CONFIG))
+                    .filter(search=SearchQuery(query, config=DISH_SEARCH_CONFIG,
+                                               search_type='websearch')))
+
+        words = query.split()
+        condition = Q()
+        for word in words:
+            condition &= Q(name__icontains=word)
+        return self.filter(condition) if words else self.none()
+
+
+class Dish(models.Model):
+    name = models.CharField(max_length=255)
+
+    objects = DishManager()
+
+    class Meta:
+        # The GIN index for search() is created on Postgres only,
+        # see migration 0006_dish
+        constraints = [
+            models.UniqueConstraint(Lower('name'), name='dish_name_ci_unique'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class MenuManager(models.Manager):
+
+    def register_vote(self, menu_id):
+        """Increment the denormalized vote tally of a menu"""
+        return self.filter(pk=menu_id).update(vote_count=F('vote_count') + 1)
+
+    def rebuild_vote_counts(self):
+        """Recalculate every vote tally from the hot and the archived votes"""
+        votes = (MenuVoteHistory.objects
+                 .filter(menu=OuterRef('pk'))
+                 .values('menu')
+                 .annotate(total=Count('pk'))
+                 .values('total'))
+        with transaction.atomic():
+            return self.update(vote_count=Coalesce(Subquery(votes), 0))
+
+    def schedule(self, menus):
+        """
+        Insert or update (on the restaurant/date key) the menus with one
+        statement, vote tallies are kept. Returns the menus with their pks
+        """
+        with transaction.atomic():
+            self.bulk_create(menus, update_conflicts=True,
+                             unique_fields=['restaurant', 'date'],
+                             update_fields=['dishes', 'updated_at'])
+            if any(menu.pk is None for menu in menus):
+                # Databases that can't return the ids of upserted rows
+                condition = Q()
+                for menu in menus:
+                    condition |= Q(restaurant_id=menu.restaurant_id, date=menu.date)
+                pks = {(restaurant_id, day): pk for pk, restaurant_id, day in
+                       self.filter(condition).values_list('pk', 'restaurant_id', 'date')}
+                for menu in menus:
+                    menu.pk = pks[menu.restaurant_id, menu.date]
+            self.sync_dishes(menus)
+        return menus
+
+    def sync_dishes(self, menus):
+        """Rebuild the Dish links of the menus from their dishes text"""
+        names_by_menu = {menu.pk: parse_dishes(menu.dishes) for menu in menus}
+        names = {name.lower(): name for names in names_by_menu.values() for name in names}
+
+        with transaction.atomic():
+            Dish.objects.bulk_create([Dish(name=name) for name in names.values()],
+                                     ignore_conflicts=True)
+            # Lowered in Python too, SQLite's LOWER() only folds ASCII letters
+            dish_ids = {name.lower(): pk for name, pk in (
+                Dish.objects
+                .annotate(lower_name=Lower('name'))
+                .filter(Q(lower_name__in=names) | Q(name__in=names.values()))
+                .values_list('name', 'pk'))}
+
+            links = Menu.dish_items.through
+            links.objects.filter(menu_id__in=names_by_menu).delete()
+            links.objects.bulk_create([
+                links(menu_id=menu_id, dish_id=dish_ids[name.lower()])
+                for menu_id, menu_names in names_by_menu.items()
+                for name in menu_names
+            ])
 
 
 class Menu(models.Model):
     restaurant = models.ForeignKey(
         Restaurant, on_delete=models.CASCADE, related_name='menus'
     )
-    date = models.DateField(auto_now_add=True)
+    # Copy of the restaurant's office, set by save(), so the rankings of
+    # an office are read from the menu indexes alone
+    office = models.ForeignKey(
+        'offices.Office', on_delete=models.PROTECT, related_name='menus'
+    )
+    # Menus can be scheduled ahead, see menus.scheduling
+    date = models.DateField(default=date.today)
     dishes = models.TextField(default='')
+    # Normalized copy of dishes, kept in sync by menus.signals
+    dish_items = models.ManyToManyField(Dish, related_name='menus', blank=True)
+    vote_count = models.PositiveIntegerField(default=0)
+    # Bumped by save() only, the vote tally updates skip it as vote_count
+    # is not part of the menu payload
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = MenuManager()
 
     class Meta:
         unique_together = ('restaurant', 'date')
+        indexes = [
+            models.Index(fields=['office', 'date', '-vote_count'],
+                         name='menu_office_date_votes_idx'),
+            models.Index(fields=['office', 'date', 'id'],
+                         name='menu_office_date_id_idx'),
+            # Date scans across offices (finalize_days, the admin)
+            models.Index(fields=['date', 'id'],
+                         name='menu_date_id_idx'),
+        ]
 
     def __str__(self):
         return f'{self.restaurant.title} menu for {self.date}'
 
+    def save(self, *args, **kwargs):
+        if self.office_id is None:
+            self.office_id = self.restaurant.office_id
+        super().save(*args, **kwargs)
+
+
+class MenuVoteManager(models.Manager):
+
+    CREATED = 'created'
+    ALREADY_VOTED = 'already_voted'
+    INVALID_MENU = 'invalid_menu'
+    VOTING_CLOSED = 'voting_closed'
+
+    def cast_votes(self, user, menu_ids, office_id):
+        """
+        Record a batch of votes of one user with set based queries, the
+        tallies are left to menus.tasks.count_votes. Menus of other
+        offices are invalid.
+        Returns a status for every menu id (in the same order) and
+        the dates of the menus that received a vote by menu id
+        """
+        menu_dates = dict(Menu.objects
+                          .filter(pk__in=set(menu_ids), office_id=office_id)
+                          .values_list('pk', 'date'))
+        voted = self.filter(user=user, created_at=date.today()).exists()
+
+        statuses = []
+        new_votes = []
+        for menu_id in menu_ids:
+            if menu_id not in menu_dates:
+                statuses.append(self.INVALID_MENU)
+            elif not is_voting_open(menu_dates[menu_id]):
+                statuses.append(self.VOTING_CLOSED)
+            elif voted:
+                statuses.append(self.ALREADY_VOTED)
+            else:
+                statuses.append(self.CREATED)
+                new_votes.append(self.model(menu_id=menu_id, user=user, office_id=office_id))
+                voted = True
+
+        try:
+            with transaction.atomic():
+                self.bulk_create(new_votes)
+        except IntegrityError:
+            statuses = [self.ALREADY_VOTED if status == self.CREATED else status
+                        for status in statuses]
+            new_votes = []
+
+        return statuses, {vote.menu_id: menu_dates[vote.menu_id] for vote in new_votes}
+
+    def archive(self, before):
+        """
+        Move the votes of the days before `before` into MenuVoteArchive,
+        one transaction per day. Returns the number of votes moved
+        """
+        using = self._db or router.db_for_write(self.model)
+        days = (self.using(using)
+                .filter(created_at__lt=before)
+                .order_by('created_at')
+                .values_list('created_at', flat=True)
+                .distinct())
+        quote = connections[using].ops.quote_name
+        columns = ', '.join(quote(column) for column in ('id', 'menu_id', 'user_id', 'office_id', 'created_at'))
+        table = quote(self.model._meta.db_table)
+        insert = (f'INSERT INTO {quote(MenuVoteArchive._meta.db_table)} ({columns}) '
+                  f'SELECT {columns} FROM {table} WHERE {quote("created_at")} = %s')
+        # Nothing references votes, skip the collector and the per row
+        # post_delete signals of a regular delete()
+        delete = f'DELETE FROM {table} WHERE {quote("created_at")} = %s'
+
+        moved = 0
+        for day in list(days):
+            with transaction.atomic(using=using), connections[using].cursor() as cursor:
+                cursor.execute(insert, [day])
+                cursor.execute(delete, [day])
+                moved += cursor.rowcount
+        return moved
+
 
 class MenuVote(models.Model):
     menu = models.ForeignKey(
@@ -25,7 +232,144 @@ class MenuVote(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE
     )
+    # Copy of the menu's office, set by save()
+    office = models.ForeignKey(
+        'offices.Office', on_delete=models.PROTECT, related_name='+'
+    )
     created_at = models.DateField(auto_now_add=True)
 
+    objects = MenuVoteManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'created_at'],
+                                    name='menu_vote_one_per_user_per_day'),
+        ]
+        indexes = [
+            # Date range scans of the rollups and the archival
+            models.Index(fields=['created_at'], name='menu_vote_created_at_idx'),
+            # Votes of an office by day
+            models.Index(fields=['office', 'created_at'], name='menu_vote_office_date_idx'),
+        ]
+
     def __str__(self):
         return f'{self.user.email} voted at {self.created_at}'
+
+    def save(self, *args, **kwargs):
+        if self.office_id is None:
+            self.office_id = self.menu.office_id
+        super().save(*args, **kwargs)
+
+
+class MenuVoteArchive(models.Model):
+    """Votes of closed days, moved out of MenuVote by MenuVote.objects.archive()"""
+    id = models.BigIntegerField(primary_key=True)
+    menu = models.ForeignKey(
+        Menu, on_delete=models.CASCADE, related_name='archived_votes'
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+'
+    )
+    office = models.ForeignKey(
+        'offices.Office', on_delete=models.PROTECT, related_name='+'
+    )
+    created_at = models.DateField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='menu_vote_archive_date_idx'),
+            models.Index(fields=['office', 'created_at'], name='menu_vote_archive_office_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user.email} voted at {self.created_at}'
+
+
+class MenuVoteHistory(models.Model):
+    """
+    Read only view over every vote, the hot MenuVote rows and the
+    archived ones (UNION ALL), see migration 0008_menuvotearchive
+    """
+    id = models.BigIntegerField(primary_key=True)
+    menu = models.ForeignKey(
+        Menu, on_delete=models.DO_NOTHING, related_name='vote_history'
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING, related_name='+'
+    )
+    office = models.ForeignKey(
+        'offices.Office', on_delete=models.DO_NOTHING, related_name='+'
+    )
+    created_at = models.DateField()
+
+    class Meta:
+        managed = False
+        db_table = 'menus_menuvote_history'
+
+    def __str__(self):
+        return f'{self.user.email} voted at {self.created_at}'
+
+
+class DailyResultManager(models.Manager):
+
+    def finalize(self, day, office_id=None):
+        """
+        Freeze the ranking of the day in an office (the default one when
+        not given), counted from the vote rows (hot and archived) rather
+        than the tallies which are updated in the background. An existing
+        result is returned as it is.
+        Returns None for a day without menus
+        """
+        if office_id is None:
+            office_id = default_office_id()
+        result = self.filter(office_id=office_id, date=day).first()
+        if result is not None:
+            return result
+
+        menus = list(Menu.objects
+                     .filter(office_id=office_id, date=day)
+                     .annotate(votes=Count('vote_history'))
+                     .order_by('-votes', 'id')
+                     .values('id', 'restaurant', 'votes'))
+        if not menus:
+            return None
+
+        winner = menus[0] if menus[0]['votes'] else None
+        result, _ = self.get_or_create(office_id=office_id, date=day, defaults={
+            'menu_id': winner and winner['id'],
+            'restaurant_id': winner and winner['restaurant'],
+            'votes': winner['votes'] if winner else 0,
+            'ranking': [{'menu': menu['id'], 'restaurant': menu['restaurant'], 'votes': menu['votes']}
+                        for menu in menus],
+        })
+        return result
+
+
+class DailyResult(models.Model):
+    """Final ranking of a closed day in an office, written once by finalize_days"""
+    office = models.ForeignKey(
+        'offices.Office', on_delete=models.PROTECT, related_name='+'
+    )
+    date = models.DateField()
+    # No winner when nobody voted
+    menu = models.ForeignKey(
+        Menu, on_delete=models.SET_NULL, null=True, related_name='+'
+    )
+    restaurant = models.ForeignKey(
+        Restaurant, on_delete=models.SET_NULL, null=True, related_name='daily_wins'
+    )
+    votes = models.PositiveIntegerField(default=0)
+    # [{'menu': id, 'restaurant': id, 'votes': n}, ...], best first
+    ranking = models.JSONField(default=list)
+    finalized_at = models.DateTimeField(auto_now_add=True)
+
+    objects = DailyResultManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['office', 'date'],
+                                    name='daily_result_one_per_office_day'),
+        ]
+
+    def __str__(self):
+        return f'Result of {self.date}'
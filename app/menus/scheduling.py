@@ -0,0 +1,20 @@
+"""
+Days a menu can be published for: from today up to MENU_SCHEDULE_DAYS
+days ahead, so restaurants can plan a week or a month at once
+"""
+from datetime import date, timedelta
+
+from django.conf import settings
+
+DEFAULT_SCHEDULE_DAYS = 31
+
+
+def schedule_horizon(today=None):
+    """The last day a menu can be scheduled for"""
+    today = today or date.today()
+    return today + timedelta(days=getattr(settings, 'MENU_SCHEDULE_DAYS', DEFAULT_SCHEDULE_DAYS))
+
+
+def is_schedulable(day, today=None):
+    today = today or date.today()
+    return today <= day <= schedule_horizon(today)
@@ -1,8 +1,19 @@
 from rest_framework import serializers
-from .models import Menu, MenuVote
-from datetime import date
-from django.db.models.functions import Cast
-from django.db import models
+
+from offices.tenancy import request_office
+from restaurants.models import Restaurant
+from .models import DailyResult, Menu, MenuVote
+from .scheduling import is_schedulable, schedule_horizon
+from .voting import is_voting_open
+
+MAX_SCHEDULED_MENUS = 1000
+
+
+def validate_schedule_date(value):
+    if not is_schedulable(value):
+        raise serializers.ValidationError(
+            f'Menus can only be published from today to {schedule_horizon().isoformat()}!')
+    return value
 
 
 class MenuSerializer(serializers.ModelSerializer):
@@ -15,9 +26,44 @@ class MenuSerializer(serializers.ModelSerializer):
                   'dishes']
 
     def validate_date(self, value):
-        from datetime import date
-        if value != date.today():
-            raise serializers.ValidationError('Menu can only be created for today!')
+        return validate_schedule_date(value)
+
+
+class MenuScheduleItemSerializer(serializers.Serializer):
+    restaurant = serializers.IntegerField()
+    date = serializers.DateField(validators=[validate_schedule_date])
+    dishes = serializers.CharField(allow_blank=True, default='')
+
+
+class MenuScheduleSerializer(serializers.Serializer):
+    """
+    Menus of the restaurants the user manages in the request's office,
+    validated in bulk: one query for the ownership of every restaurant
+    """
+    menus = MenuScheduleItemSerializer(many=True, allow_empty=False, max_length=MAX_SCHEDULED_MENUS)
+
+    def validate_menus(self, items):
+        request = self.context['request']
+        managed = set(Restaurant.objects
+                      .filter(pk__in={item['restaurant'] for item in items},
+                              manager_id=request.user.pk,
+                              office=request_office(request))
+                      .values_list('pk', flat=True))
+
+        errors = []
+        seen = set()
+        for item in items:
+            key = (item['restaurant'], item['date'])
+            if item['restaurant'] not in managed:
+                errors.append({'restaurant': ['You do not manage this restaurant!']})
+            elif key in seen:
+                errors.append({'date': ['Duplicate menu for this restaurant and date!']})
+            else:
+                errors.append({})
+            seen.add(key)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return items
 
 
 class MenuVoteSerializer(serializers.ModelSerializer):
@@ -26,15 +72,34 @@ class MenuVoteSerializer(serializers.ModelSerializer):
     class Meta:
         model = MenuVote
         fields = '__all__'
+        read_only_fields = ['office']
+        # One vote per user per day is enforced by the database constraint,
+        # MenuVoteViewSet turns the IntegrityError into a validation error
+        validators = []
+
+    def validate_menu(self, value):
+        if value.office_id != request_office(self.context['request']).pk:
+            raise serializers.ValidationError('This menu belongs to another office!')
+        if not is_voting_open(value.date):
+            raise serializers.ValidationError('Voting for this day is closed!')
+        return value
+
+
+class MenuVoteBatchItemSerializer(serializers.Serializer):
+    menu = serializers.IntegerField()
 
-    def validate(self, data):
-        user = data['user']
-        today = date.today()
 
-        if (MenuVote.objects.
-                annotate(created_at_date=Cast('created_at',
-                                              output_field=models.DateField())).
-                filter(user=user, created_at=today).exists()):
-            raise serializers.ValidationError('You have already voted!')
+class MenuVoteBatchSerializer(serializers.Serializer):
+    votes = MenuVoteBatchItemSerializer(many=True, allow_empty=False, max_length=100)
 
-        return data
+
+class DailyResultSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = DailyResult
+        fields = ['date',
+                  'menu',
+                  'restaurant',
+                  'votes',
+                  'ranking',
+                  'finalized_at']
@@ -0,0 +1,36 @@
+"""
+Signal handlers that keep the today's ranking cache, the
+dish links and the menu ETags in sync with the data
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from common.conditional import bump_table_version
+from .cache import get_ranking_cache
+from .models import Menu, MenuVote
+
+
+def invalidate_ranking(office_id, day):
+    transaction.on_commit(lambda: get_ranking_cache().invalidate(office_id, day))
+
+
+@receiver([post_save, post_delete], sender=Menu)
+def menu_changed(sender, instance, **kwargs):
+    invalidate_ranking(instance.office_id, instance.date)
+
+
+@receiver([post_save, post_delete], sender=Menu)
+def bump_menu_version(sender, **kwargs):
+    bump_table_version(Menu)
+
+
+@receiver([post_save, post_delete], sender=MenuVote)
+def menu_vote_changed(sender, instance, **kwargs):
+    invalidate_ranking(instance.office_id, instance.menu.date)
+
+
+@receiver(post_save, sender=Menu)
+def sync_menu_dishes(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'dishes' in update_fields:
+        Menu.objects.sync_dishes([instance])
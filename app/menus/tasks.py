@@ -0,0 +1,29 @@
+"""
+Side effects of the votes, queued by MenuVoteViewSet once they commit
+"""
+from django.db import transaction
+
+from common.tasks import task
+from .cache import get_ranking_cache
+from .events import get_ranking_hub
+from .models import Menu
+
+
+@task
+def count_votes(office_id, voted_menus):
+    """Add the votes ({menu_id: date}) of an office to the menu tallies, then announce them"""
+    with transaction.atomic():
+        for menu_id in voted_menus:
+            Menu.objects.register_vote(menu_id)
+        # A separate task, so its retries never count the votes twice
+        announce_votes.delay(office_id, voted_menus)
+
+
+@task
+def announce_votes(office_id, voted_menus):
+    """Drop the cached rankings of the days and push the new tallies to the live streams"""
+    for day in set(voted_menus.values()):
+        get_ranking_cache().invalidate(office_id, day)
+    # Read once count_votes committed
+    menus = Menu.objects.filter(pk__in=voted_menus).values('id', 'date', 'vote_count')
+    get_ranking_hub().publish_tallies(office_id, menus)
@@ -1,11 +1,32 @@
+import asyncio
+import json
+from importlib import import_module
+from unittest import mock
+
 import pytest
+from asgiref.sync import async_to_sync
+from django.apps import apps
 from django.contrib.auth import get_user_model
-from rest_framework.test import APIRequestFactory, force_authenticate
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+from django.test import AsyncClient
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
 from rest_framework import status
-from datetime import date
+from rest_framework_simplejwt.tokens import AccessToken
+from datetime import date, datetime, time, timedelta
+from io import StringIO
 
-from .models import Menu, MenuVote
+from common.models import TableVersion
+from common.pagination import EstimatedCountPaginator
+from .cache import DjangoCacheBackend, LocMemBackend, get_ranking_cache
+from .dishes import parse_dishes
+from .events import LocalBroker, RankingHub, get_ranking_hub
+from .models import DailyResult, Dish, Menu, MenuVote, MenuVoteArchive, MenuVoteHistory
+from .tasks import announce_votes
 from .views import MenuViewSet, MenuVoteViewSet
+from .voting import is_voting_open, last_closed_day
 from restaurants.models import Restaurant
 
 
@@ -64,6 +85,23 @@ def api_factory():
     return APIRequestFactory()
 
 
+@pytest.fixture(autouse=True)
+def immediate_tasks(settings):
+    settings.TASKS = {'BACKEND': 'common.tasks.ImmediateBackend'}
+
+
+@pytest.fixture(autouse=True)
+def voting_open_all_day(settings):
+    settings.MENU_VOTING_CUTOFF = '23:59:59.999999'
+
+
+@pytest.fixture(autouse=True)
+def clear_ranking_cache():
+    get_ranking_cache().clear()
+    yield
+    get_ranking_cache().clear()
+
+
 @pytest.mark.django_db
 class TestMenuModel:
     def test_menu_creation(self, menu):
@@ -85,6 +123,115 @@ class TestMenuModel:
             )
 
 
+@pytest.mark.django_db
+class TestMenuListPagination:
+    @pytest.fixture
+    def history(self, restaurant):
+        restaurant2 = Restaurant.objects.create(
+            manager=restaurant.manager, title='Second', address='2 St', phone_number='+2')
+        menus = []
+        for offset in reversed(range(5)):
+            for owner in (restaurant, restaurant2):
+                menu = Menu.objects.create(restaurant=owner, dishes=f'Day {offset}')
+                Menu.objects.filter(pk=menu.pk).update(date=date.today() - timedelta(days=offset))
+                menus.append(menu)
+        return menus
+
+    def list_menus(self, api_factory, path):
+        view = MenuViewSet.as_view({'get': 'list'})
+        return view(api_factory.get(path))
+
+    def test_pages_follow_date_and_id_order(self, api_factory, history):
+        seen = []
+        response = self.list_menus(api_factory, '/menus/?page_size=3')
+        while True:
+            seen += [(item['date'], item['id']) for item in response.data['results']]
+            if not response.data['next']:
+                break
+            response = self.list_menus(api_factory, response.data['next'])
+        assert len(seen) == len(history)
+        assert seen == sorted(seen, reverse=True)
+
+    def test_date_range_filter(self, api_factory, history):
+        date_from = (date.today() - timedelta(days=1)).isoformat()
+        response = self.list_menus(api_factory, f'/menus/?date_from={date_from}&date_to={date.today()}')
+        assert len(response.data['results']) == 4
+
+    def test_restaurant_filter(self, api_factory, history, restaurant):
+        response = self.list_menus(api_factory, f'/menus/?restaurant={restaurant.id}')
+        assert {item['restaurant'] for item in response.data['results']} == {restaurant.id}
+        assert len(response.data['results']) == 5
+
+    def test_invalid_filter(self, api_factory, history):
+        response = self.list_menus(api_factory, '/menus/?date_from=yesterday')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestParseDishes:
+    def test_splits_and_normalizes(self):
+        assert parse_dishes(' Borscht,  Chicken   Kyiv;Salad\nborscht, ') == [
+            'Borscht', 'Chicken Kyiv', 'Salad']
+
+    def test_empty(self):
+        assert parse_dishes('') == []
+
+
+@pytest.mark.django_db
+class TestDishSearch:
+    def test_menu_save_syncs_dishes(self, menu):
+        assert sorted(menu.dish_items.values_list('name', flat=True)) == ['Test Dish 1', 'Test Dish 2']
+        menu.dishes = 'Borscht, test dish 1'
+        menu.save()
+        assert sorted(menu.dish_items.values_list('name', flat=True)) == ['Borscht', 'Test Dish 1']
+        assert Dish.objects.count() == 3
+
+    def test_non_ascii_names(self, menu):
+        menu.dishes = 'Борщ, Вареники'
+        menu.save()
+        Menu.objects.create(restaurant=menu.restaurant, date=menu.date + timedelta(days=1), dishes='Борщ')
+        assert sorted(menu.dish_items.values_list('name', flat=True)) == ['Борщ', 'Вареники']
+        assert Dish.objects.filter(name='Борщ').count() == 1
+
+    def test_migration_splits_non_ascii_dishes(self, menu):
+        split_menu_dishes = import_module('menus.migrations.0006_dish').split_menu_dishes
+        Menu.objects.filter(pk=menu.pk).update(dishes='Борщ, Вареники')
+        Dish.objects.all().delete()
+        split_menu_dishes(apps, None)
+        assert sorted(menu.dish_items.values_list('name', flat=True)) == ['Борщ', 'Вареники']
+
+    def test_search_endpoint(self, api_factory, menu, restaurant):
+        other = Menu.objects.create(
+            restaurant=Restaurant.objects.create(manager=restaurant.manager, title='Other',
+                                                 address='2 St', phone_number='+2'),
+            dishes='Borscht, Varenyky')
+        view = MenuViewSet.as_view({'get': 'search'})
+        response = view(api_factory.get('/menus/search/', {'q': 'borscht'}))
+        assert response.status_code == status.HTTP_200_OK
+        assert [item['id'] for item in response.data['results']] == [other.id]
+
+        response = view(api_factory.get('/menus/search/', {'q': 'dish', 'restaurant': restaurant.id}))
+        assert [item['id'] for item in response.data['results']] == [menu.id]
+
+    def test_search_requires_query(self, api_factory):
+        view = MenuViewSet.as_view({'get': 'search'})
+        assert view(api_factory.get('/menus/search/')).status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestMenuVoteTally:
+    def test_register_vote_increments_tally(self, menu):
+        Menu.objects.register_vote(menu.id)
+        Menu.objects.register_vote(menu.id)
+        menu.refresh_from_db()
+        assert menu.vote_count == 2
+
+    def test_rebuild_vote_counts_command(self, menu, menu_vote):
+        Menu.objects.filter(pk=menu.pk).update(vote_count=42)
+        call_command('rebuild_vote_counts')
+        menu.refresh_from_db()
+        assert menu.vote_count == 1
+
+
 @pytest.mark.django_db
 class TestMenuVoteModel:
     def test_menu_vote_creation(self, menu_vote):
@@ -93,6 +240,39 @@ class TestMenuVoteModel:
         assert menu_vote.user.name == 'Regular User'
 
 
+@pytest.mark.django_db
+class TestMenuVoteArchive:
+    @pytest.fixture
+    def old_vote(self, menu, staff_user):
+        vote = MenuVote.objects.create(menu=menu, user=staff_user)
+        MenuVote.objects.filter(pk=vote.pk).update(created_at=date.today() - timedelta(days=10))
+        return vote
+
+    def test_archive_moves_closed_days(self, old_vote, menu_vote):
+        assert MenuVote.objects.archive(date.today()) == 1
+        assert list(MenuVote.objects.values_list('pk', flat=True)) == [menu_vote.pk]
+        archived = MenuVoteArchive.objects.get()
+        assert (archived.pk, archived.user_id, archived.office_id) == (old_vote.pk, old_vote.user_id,
+                                                                       old_vote.office_id)
+
+    def test_history_spans_both_tables(self, menu, old_vote, menu_vote):
+        MenuVote.objects.archive(date.today())
+        assert sorted(MenuVoteHistory.objects.filter(menu=menu).values_list('pk', flat=True)) == [
+            old_vote.pk, menu_vote.pk]
+        assert MenuVoteHistory.objects.filter(office=menu.office_id).count() == 2
+
+    def test_rebuild_vote_counts_includes_archive(self, menu, old_vote, menu_vote):
+        MenuVote.objects.archive(date.today())
+        Menu.objects.rebuild_vote_counts()
+        menu.refresh_from_db()
+        assert menu.vote_count == 2
+
+    def test_deleting_menu_removes_archived_votes(self, menu, old_vote):
+        MenuVote.objects.archive(date.today())
+        menu.delete()
+        assert not MenuVoteArchive.objects.exists()
+
+
 @pytest.mark.django_db
 class TestMenuViewSet:
     def test_list_menus(self, api_factory, menu):
@@ -100,8 +280,8 @@ class TestMenuViewSet:
         view = MenuViewSet.as_view({'get': 'list'})
         response = view(request)
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == 1
-        assert response.data[0]['restaurant'] == menu.restaurant.id
+        assert len(response.data['results']) == 1
+        assert response.data['results'][0]['restaurant'] == menu.restaurant.id
 
     def test_create_menu_as_staff(self, api_factory, staff_user, restaurant):
         data = {
@@ -128,7 +308,7 @@ class TestMenuViewSet:
         response = view(request)
         assert response.status_code == status.HTTP_403_FORBIDDEN
 
-    def test_today_menu_action(self, api_factory, menu):
+    def test_today_menu_action(self, api_factory, regular_user, menu):
         # Create another menu with a vote to test ordering
         restaurant2 = Restaurant.objects.create(
             manager=User.objects.create_user(
@@ -146,35 +326,194 @@ class TestMenuViewSet:
             date=date.today(),
             dishes="Second Menu"
         )
-        MenuVote.objects.create(menu=menu2, user=regular_user())
+        MenuVote.objects.create(menu=menu2, user=regular_user)
+        Menu.objects.register_vote(menu2.id)
 
         request = api_factory.get('/menus/today_menu/')
         view = MenuViewSet.as_view({'get': 'today_menu'})
         response = view(request)
         assert response.status_code == status.HTTP_200_OK
-        assert response.data['restaurant'] == menu2.restaurant.id
+        assert json.loads(response.content)['restaurant'] == menu2.restaurant.id
 
     def test_today_rating_action(self, api_factory, menu):
         request = api_factory.get('/menus/today_rating/')
         view = MenuViewSet.as_view({'get': 'today_rating'})
         response = view(request)
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == 1
-        assert response.data[0]['restaurant'] == menu.restaurant.id
+        data = json.loads(response.content)
+        assert len(data) == 1
+        assert data[0]['restaurant'] == menu.restaurant.id
+
+
+@pytest.mark.django_db
+class TestRankingCache:
+    def get_rating(self, api_factory):
+        request = api_factory.get('/menus/today_rating/')
+        view = MenuViewSet.as_view({'get': 'today_rating'})
+        return json.loads(view(request).content)
+
+    def test_second_request_is_served_from_cache(self, api_factory, menu, django_assert_num_queries):
+        self.get_rating(api_factory)
+        with django_assert_num_queries(0):
+            data = self.get_rating(api_factory)
+        assert data[0]['id'] == menu.id
+        stats = get_ranking_cache().stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+
+    def test_vote_invalidates_cache(self, api_factory, menu, regular_user, django_capture_on_commit_callbacks):
+        self.get_rating(api_factory)
+        with django_capture_on_commit_callbacks(execute=True):
+            MenuVote.objects.create(menu=menu, user=regular_user)
+        self.get_rating(api_factory)
+        assert get_ranking_cache().stats()['misses'] == 2
+
+    def test_menu_change_invalidates_cache(self, api_factory, menu, django_capture_on_commit_callbacks):
+        self.get_rating(api_factory)
+        with django_capture_on_commit_callbacks(execute=True):
+            menu.dishes = 'Borscht'
+            menu.save()
+        assert self.get_rating(api_factory)[0]['dishes'] == 'Borscht'
+
+    def test_django_cache_backend(self, settings, api_factory, menu):
+        settings.MENU_RANKING_CACHE = {
+            'BACKEND': 'menus.cache.DjangoCacheBackend',
+            'OPTIONS': {'alias': 'default', 'timeout': 60},
+        }
+        assert isinstance(get_ranking_cache().backend, DjangoCacheBackend)
+        self.get_rating(api_factory)
+        self.get_rating(api_factory)
+        assert get_ranking_cache().stats()['hits'] == 1
+
+    def test_default_backend_is_local_memory(self):
+        assert isinstance(get_ranking_cache().backend, LocMemBackend)
+
+    def test_local_memory_entries_expire(self):
+        backend = LocMemBackend(timeout=5)
+        with mock.patch('menus.cache.time.monotonic', return_value=100.0):
+            backend.set('key', b'[]')
+            assert backend.get('key') == b'[]'
+        with mock.patch('menus.cache.time.monotonic', return_value=105.0):
+            assert backend.get('key') is None
+
+    def test_cache_stats_requires_admin(self, api_factory, regular_user):
+        request = api_factory.get('/menus/cache_stats/')
+        force_authenticate(request, user=regular_user)
+        view = MenuViewSet.as_view({'get': 'cache_stats'})
+        assert view(request).status_code == status.HTTP_403_FORBIDDEN
+
+        admin = User.objects.create_superuser('admin@example.com', 'testpass123')
+        request = api_factory.get('/menus/cache_stats/')
+        force_authenticate(request, user=admin)
+        response = view(request)
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.data) == {'backend', 'hits', 'misses', 'hit_ratio'}
+
+
+@pytest.mark.django_db
+class TestMenuSchedule:
+    def schedule(self, api_factory, user, data, **kwargs):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client.post('/api/menus/schedule/', data=data, **kwargs)
+
+    def week(self, restaurant, dishes='Soup, Salad'):
+        return [{'restaurant': restaurant.id, 'date': (date.today() + timedelta(days=offset)).isoformat(),
+                 'dishes': dishes} for offset in range(7)]
+
+    def test_json_week_is_upserted(self, api_factory, staff_user, restaurant):
+        response = self.schedule(api_factory, staff_user, self.week(restaurant), format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['menus']) == 7
+        ids = [menu['id'] for menu in response.data['menus']]
+        Menu.objects.filter(pk=ids[0]).update(vote_count=3)
+
+        response = self.schedule(api_factory, staff_user, {'menus': self.week(restaurant, 'Borscht')}, format='json')
+        assert [menu['id'] for menu in response.data['menus']] == ids
+        assert set(Menu.objects.values_list('dishes', flat=True)) == {'Borscht'}
+        assert Menu.objects.get(pk=ids[0]).vote_count == 3
+        assert set(Dish.objects.get(name='Borscht').menus.values_list('pk', flat=True)) == set(ids)
+
+    def test_csv_upload(self, api_factory, staff_user, restaurant):
+        tomorrow = date.today() + timedelta(days=1)
+        body = f'restaurant,date,dishes\r\n{restaurant.id},{tomorrow},"Pho, Ramen"\r\n'
+        response = self.schedule(api_factory, staff_user, body, content_type='text/csv')
+        assert response.status_code == status.HTTP_200_OK
+        menu = Menu.objects.get()
+        assert (menu.date, menu.dishes, menu.office_id) == (tomorrow, 'Pho, Ramen', restaurant.office_id)
+
+    def test_queries_do_not_grow_with_the_menus(self, api_factory, staff_user, restaurant):
+        TableVersion.objects.bump(Menu)  # Its first bump inserts the row
+        with CaptureQueriesContext(connection) as week:
+            self.schedule(api_factory, staff_user, self.week(restaurant)[:2], format='json')
+        Menu.objects.all().delete()
+        with CaptureQueriesContext(connection) as more:
+            self.schedule(api_factory, staff_user, self.week(restaurant), format='json')
+        assert len(more) == len(week)
+
+    def test_invalid_items_reject_the_whole_upload(self, api_factory, staff_user, restaurant, regular_user):
+        other = Restaurant.objects.create(manager=regular_user, title='Other', address='1 St', phone_number='+1')
+        menus = self.week(restaurant)[:2] + [
+            {'restaurant': other.id, 'date': date.today().isoformat()},
+            {'restaurant': restaurant.id, 'date': date.today().isoformat()},
+        ]
+        response = self.schedule(api_factory, staff_user, menus, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        errors = response.data['menus']
+        assert errors[:2] == [{}, {}]
+        assert set(errors[2]) == {'restaurant'}
+        assert set(errors[3]) == {'date'}
+
+        past = [{'restaurant': restaurant.id, 'date': (date.today() - timedelta(days=1)).isoformat()}]
+        response = self.schedule(api_factory, staff_user, past, format='json')
+        assert set(response.data['menus'][0]) == {'date'}
+        assert not Menu.objects.exists()
+
+    def test_regular_users_cannot_schedule(self, api_factory, regular_user, restaurant):
+        response = self.schedule(api_factory, regular_user, self.week(restaurant), format='json')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_scheduled_menus_take_votes_on_their_day_only(self, api_factory, regular_user, restaurant):
+        tomorrow = Menu.objects.create(restaurant=restaurant, date=date.today() + timedelta(days=1))
+        request = api_factory.post('/menus/vote/', data={'menu': tomorrow.id})
+        request.app_version = '2.0.0'
+        force_authenticate(request, user=regular_user)
+        response = MenuVoteViewSet.as_view({'post': 'create'})(request)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not MenuVote.objects.exists()
 
 
 @pytest.mark.django_db
 class TestMenuVoteViewSet:
-    def test_create_vote_as_regular_user(self, api_factory, regular_user, menu):
+    def test_create_vote_as_regular_user(self, api_factory, regular_user, menu,
+                                         django_capture_on_commit_callbacks):
         data = {
             'menu': menu.id
         }
         request = api_factory.post('/menus/vote/', data=data)
+        request.app_version = '2.0.0'
         force_authenticate(request, user=regular_user)
         view = MenuVoteViewSet.as_view({'post': 'create'})
-        response = view(request)
+        with django_capture_on_commit_callbacks(execute=True):
+            response = view(request)
+        assert response.status_code == status.HTTP_201_CREATED
+        assert MenuVote.objects.count() == 1
+        menu.refresh_from_db()
+        assert menu.vote_count == 1
+
+    def test_tally_waits_for_commit(self, api_factory, regular_user, menu, django_capture_on_commit_callbacks):
+        request = api_factory.post('/menus/vote/', data={'menu': menu.id})
+        request.app_version = '2.0.0'
+        force_authenticate(request, user=regular_user)
+        with django_capture_on_commit_callbacks() as callbacks:
+            response = MenuVoteViewSet.as_view({'post': 'create'})(request)
         assert response.status_code == status.HTTP_201_CREATED
-        assert MenuVote.objects.count() == 2  # Including the fixture vote
+        menu.refresh_from_db()
+        assert menu.vote_count == 0
+        for callback in callbacks:
+            callback()
+        menu.refresh_from_db()
+        assert menu.vote_count == 1
 
     def test_create_vote_as_staff(self, api_factory, staff_user, menu):
         data = {
@@ -191,7 +530,335 @@ class TestMenuVoteViewSet:
             'menu': menu_vote.menu.id
         }
         request = api_factory.post('/menus/vote/', data=data)
+        request.app_version = '2.0.0'
+        force_authenticate(request, user=regular_user)
+        view = MenuVoteViewSet.as_view({'post': 'create'})
+        response = view(request)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert MenuVote.objects.count() == 1
+
+    def test_vote_checks_duplicates_without_select(self, api_factory, regular_user, menu):
+        request = api_factory.post('/menus/vote/', data={'menu': menu.id})
+        request.app_version = '2.0.0'
+        force_authenticate(request, user=regular_user)
+        view = MenuVoteViewSet.as_view({'post': 'create'})
+        with CaptureQueriesContext(connection) as context:
+            response = view(request)
+        assert response.status_code == status.HTTP_201_CREATED
+        vote_selects = [query['sql'] for query in context.captured_queries
+                        if query['sql'].startswith('SELECT') and 'menus_menuvote' in query['sql']]
+        assert vote_selects == []
+
+    def test_outdated_app_version_cannot_vote(self, api_factory, regular_user, menu):
+        request = api_factory.post('/menus/vote/', data={'menu': menu.id})
+        request.app_version = '1.9.0'
         force_authenticate(request, user=regular_user)
         view = MenuVoteViewSet.as_view({'post': 'create'})
         response = view(request)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['voting_allowed'] is False
+        assert MenuVote.objects.count() == 0
+
+    def test_one_vote_per_user_per_day_constraint(self, menu_vote):
+        with pytest.raises(IntegrityError):
+            MenuVote.objects.create(menu=menu_vote.menu, user=menu_vote.user)
+
+
+@pytest.mark.django_db
+class TestMenuVoteBatch:
+    def post_batch(self, api_factory, user, votes):
+        request = api_factory.post('/menus/vote/batch/', data={'votes': votes}, format='json')
+        request.app_version = '2.0.0'
+        force_authenticate(request, user=user)
+        view = MenuVoteViewSet.as_view({'post': 'batch'})
+        return view(request)
+
+    def test_batch_returns_status_per_item(self, api_factory, regular_user, menu,
+                                           django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            response = self.post_batch(api_factory, regular_user,
+                                       [{'menu': menu.id}, {'menu': menu.id}, {'menu': 999999}])
+        assert response.status_code == status.HTTP_200_OK
+        assert [item['status'] for item in response.data['results']] == [
+            'created', 'already_voted', 'invalid_menu']
+        assert MenuVote.objects.filter(user=regular_user).count() == 1
+        menu.refresh_from_db()
+        assert menu.vote_count == 1
+
+    def test_batch_after_single_vote(self, api_factory, regular_user, menu_vote):
+        response = self.post_batch(api_factory, regular_user, [{'menu': menu_vote.menu.id}])
+        assert response.data['results'][0]['status'] == 'already_voted'
+        assert MenuVote.objects.count() == 1
+
+    def test_batch_uses_set_based_queries(self, api_factory, regular_user, menu, django_assert_max_num_queries):
+        votes = [{'menu': menu.id}] * 50
+        with django_assert_max_num_queries(6):
+            response = self.post_batch(api_factory, regular_user, votes)
+        assert len(response.data['results']) == 50
+
+    def test_batch_rejects_empty_payload(self, api_factory, regular_user):
+        response = self.post_batch(api_factory, regular_user, [])
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_batch_forbidden_for_staff(self, api_factory, staff_user, menu):
+        response = self.post_batch(api_factory, staff_user, [{'menu': menu.id}])
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+class TestAdmin:
+    def add_votes(self, menu, count):
+        for _ in range(count):
+            user = User.objects.create_user(email=f'voter{User.objects.count()}@example.com')
+            MenuVote.objects.create(menu=menu, user=user)
+
+    @pytest.mark.parametrize('url', ['/admin/menus/menuvote/', '/admin/menus/menu/', '/admin/users/user/'])
+    def test_changelist_queries_do_not_grow_with_rows(self, admin_client, menu, url):
+        self.add_votes(menu, 2)
+        with CaptureQueriesContext(connection) as few:
+            assert admin_client.get(url).status_code == 200
+        self.add_votes(menu, 10)
+        with CaptureQueriesContext(connection) as more:
+            assert admin_client.get(url).status_code == 200
+        assert len(more) == len(few)
+
+    @pytest.mark.parametrize('period', ['today', 'week', 'month'])
+    def test_recent_date_filter(self, admin_client, menu_vote, period):
+        MenuVote.objects.filter(pk=menu_vote.pk).update(created_at=date.today() - timedelta(days=40))
+        other = MenuVote.objects.create(menu=menu_vote.menu, user=User.objects.create_user(email='x@example.com'))
+        response = admin_client.get('/admin/menus/menuvote/', {'period': period})
+        assert response.status_code == 200
+        assert [vote.pk for vote in response.context['cl'].result_list] == [other.pk]
+
+    def test_no_date_hierarchy_queries(self, admin_client, menu_vote):
+        with CaptureQueriesContext(connection) as queries:
+            admin_client.get('/admin/menus/menuvote/')
+        assert not any('DISTINCT' in query['sql'] for query in queries)
+
+    def test_autocomplete_widgets(self, admin_client, menu_vote):
+        response = admin_client.get(f'/admin/menus/menuvote/{menu_vote.pk}/change/')
+        assert response.status_code == 200
+        assert b'admin-autocomplete' in response.content
+        response = admin_client.get('/admin/autocomplete/', {
+            'app_label': 'menus', 'model_name': 'menuvote', 'field_name': 'user', 'term': 'regular'})
+        assert [item['text'] for item in response.json()['results']] == ['regular@example.com']
+
+    def test_estimated_count_for_unfiltered_tables(self, menu_vote):
+        paginator = EstimatedCountPaginator(MenuVote.objects.order_by('pk'), 100)
+        with mock.patch('common.pagination.estimated_row_count', return_value=5_000_000):
+            assert paginator.count == 5_000_000
+            filtered = EstimatedCountPaginator(MenuVote.objects.filter(created_at=date.today()).order_by('pk'), 100)
+            assert filtered.count == 1
+        # Small tables and other databases than PostgreSQL are counted
+        assert EstimatedCountPaginator(MenuVote.objects.order_by('pk'), 100).count == 1
+
+
+@pytest.mark.django_db
+class TestDailyResults:
+    YESTERDAY = date.today() - timedelta(days=1)
+
+    @pytest.fixture
+    def past_menus(self, restaurant, staff_user):
+        other = Restaurant.objects.create(manager=staff_user, title='Other', address='1 St', phone_number='+1')
+        menus = [Menu.objects.create(restaurant=owner, date=date.today()) for owner in (restaurant, other)]
+        Menu.objects.filter(pk__in=[menu.pk for menu in menus]).update(date=self.YESTERDAY)
+        return menus
+
+    def vote(self, menu, count):
+        for _ in range(count):
+            user = User.objects.create_user(email=f'voter{User.objects.count()}@example.com')
+            MenuVote.objects.create(menu=menu, user=user)
+
+    def test_voting_window(self, settings):
+        settings.MENU_VOTING_CUTOFF = '12:00'
+        morning = timezone.make_aware(datetime.combine(date.today(), time(11, 59)))
+        afternoon = morning + timedelta(minutes=1)
+        assert is_voting_open(date.today(), now=morning)
+        assert not is_voting_open(date.today(), now=afternoon)
+        assert not is_voting_open(self.YESTERDAY, now=morning)
+        assert not is_voting_open(date.today() + timedelta(days=1), now=morning)
+        assert last_closed_day(now=morning) == self.YESTERDAY
+        assert last_closed_day(now=afternoon) == date.today()
+
+    def test_finalize_freezes_ranking(self, past_menus):
+        first, second = past_menus
+        self.vote(first, 1)
+        self.vote(second, 2)
+        result = DailyResult.objects.finalize(self.YESTERDAY)
+        assert (result.menu_id, result.restaurant_id, result.votes) == (second.id, second.restaurant_id, 2)
+        assert [entry['menu'] for entry in result.ranking] == [second.id, first.id]
+
+        # Late writes do not change the result
+        self.vote(first, 5)
+        assert DailyResult.objects.finalize(self.YESTERDAY) == result
+        result.refresh_from_db()
+        assert result.menu_id == second.id
+
+    def test_tie_goes_to_first_menu(self, past_menus):
+        self.vote(past_menus[0], 1)
+        self.vote(past_menus[1], 1)
+        assert DailyResult.objects.finalize(self.YESTERDAY).menu_id == past_menus[0].id
+
+    def test_no_votes_no_winner(self, past_menus):
+        result = DailyResult.objects.finalize(self.YESTERDAY)
+        assert result.menu is None and result.votes == 0
+        assert DailyResult.objects.finalize(self.YESTERDAY - timedelta(days=1)) is None
+
+    def test_command_finalizes_closed_days_only(self, settings, past_menus, menu):
+        settings.MENU_VOTING_CUTOFF = '23:59:59.999999'
+        call_command('finalize_days', stdout=StringIO())
+        assert list(DailyResult.objects.values_list('date', flat=True)) == [self.YESTERDAY]
+        with pytest.raises(CommandError):
+            call_command('finalize_days', date=date.today(), stdout=StringIO())
+
+        settings.MENU_VOTING_CUTOFF = '00:00'
+        call_command('finalize_days', stdout=StringIO())
+        assert DailyResult.objects.count() == 2
+
+    def test_vote_after_cutoff_rejected(self, settings, api_factory, regular_user, menu):
+        settings.MENU_VOTING_CUTOFF = '00:00'
+        request = api_factory.post('/menus/vote/', data={'menu': menu.id})
+        request.app_version = '2.0.0'
+        force_authenticate(request, user=regular_user)
+        response = MenuVoteViewSet.as_view({'post': 'create'})(request)
         assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not MenuVote.objects.exists()
+
+    def test_batch_vote_after_cutoff(self, settings, api_factory, regular_user, menu):
+        settings.MENU_VOTING_CUTOFF = '00:00'
+        request = api_factory.post('/menus/vote/batch/', data={'votes': [{'menu': menu.id}]}, format='json')
+        request.app_version = '2.0.0'
+        force_authenticate(request, user=regular_user)
+        response = MenuVoteViewSet.as_view({'post': 'batch'})(request)
+        assert response.data['results'] == [{'menu': menu.id, 'status': 'voting_closed'}]
+
+    def test_results_endpoint(self, api_factory, past_menus):
+        self.vote(past_menus[1], 1)
+        DailyResult.objects.finalize(self.YESTERDAY)
+        view = MenuViewSet.as_view({'get': 'results'})
+        response = view(api_factory.get('/menus/results/'), day=self.YESTERDAY.isoformat())
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['menu'] == past_menus[1].id
+        assert response.data['ranking'][0] == {'menu': past_menus[1].id,
+                                               'restaurant': past_menus[1].restaurant_id, 'votes': 1}
+        assert view(api_factory.get('/'), day=date.today().isoformat()).status_code == status.HTTP_404_NOT_FOUND
+        assert view(api_factory.get('/'), day='2025-13-01').status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestAsyncMenuViews:
+    def get(self, path, **headers):
+        return async_to_sync(AsyncClient().get)(path, headers=headers)
+
+    def test_list_matches_sync_view(self, api_factory, menu):
+        response = self.get('/api/async/menus/')
+        assert response.status_code == status.HTTP_200_OK
+        sync_response = MenuViewSet.as_view({'get': 'list'})(api_factory.get('/menus/'))
+        assert json.loads(response.content) == json.loads(sync_response.render().content)
+
+    def test_list_filters_and_paginates(self, menu):
+        response = self.get('/api/async/menus/?page_size=1&date_from=2000-01-01')
+        assert [item['id'] for item in json.loads(response.content)['results']] == [menu.id]
+        assert self.get('/api/async/menus/?date_from=bad').status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_retrieve(self, menu):
+        response = self.get(f'/api/async/menus/{menu.id}/')
+        assert json.loads(response.content)['dishes'] == menu.dishes
+        missing = self.get('/api/async/menus/999999/')
+        assert missing.status_code == status.HTTP_404_NOT_FOUND
+        assert missing.content == APIClient().get('/api/menus/999999/').content
+
+    def test_today_endpoints_share_ranking_cache(self, api_factory, menu):
+        rating = self.get('/api/async/menus/today_rating/')
+        sync_rating = MenuViewSet.as_view({'get': 'today_rating'})(api_factory.get('/menus/today_rating/'))
+        assert rating.content == sync_rating.content
+        assert get_ranking_cache().stats()['hits'] == 1
+
+        response = self.get('/api/async/menus/today_menu/')
+        assert json.loads(response.content)['id'] == menu.id
+
+    def test_valid_token_is_accepted(self, regular_user, menu):
+        token = AccessToken.for_user(regular_user)
+        response = self.get('/api/async/menus/', Authorization=f'Bearer {token}')
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_invalid_token_is_rejected(self, menu):
+        response = self.get('/api/async/menus/', Authorization='Bearer not-a-token')
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert 'WWW-Authenticate' in response.headers
+
+    def test_write_methods_not_allowed(self, menu):
+        response = async_to_sync(AsyncClient().post)('/api/async/menus/', {})
+        assert response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
+
+
+class TestRankingHub:
+    def test_local_broker_fans_out_to_subscribers(self):
+        hub = RankingHub(LocalBroker(), queue_size=1)
+
+        async def scenario():
+            async with hub.subscribe() as first, hub.subscribe() as second:
+                hub.publish_tallies(3, [{'id': 7, 'date': date(2025, 1, 2), 'vote_count': 4}])
+                await asyncio.sleep(0)
+                expected = {'office': 3, 'menu': 7, 'date': '2025-01-02', 'vote_count': 4}
+                assert await first.queue.get() == expected
+                assert await second.queue.get() == expected
+
+                hub.publish_tallies(3, [{'id': 1, 'date': date.today(), 'vote_count': 1},
+                                        {'id': 2, 'date': date.today(), 'vote_count': 1}])
+                await asyncio.sleep(0)
+                assert first.overflowed
+                first.drain()
+                assert first.queue.empty() and not first.overflowed
+            assert hub._subscriptions == set()
+
+        async_to_sync(scenario)()
+
+
+@pytest.mark.django_db
+class TestRankingStream:
+    def test_snapshot_then_vote_events(self, menu):
+        async def read_event(stream):
+            return (await anext(stream)).decode()
+
+        async def scenario():
+            response = await AsyncClient().get('/api/async/menus/today_rating/stream/')
+            assert response['Content-Type'] == 'text/event-stream'
+            stream = aiter(response.streaming_content)
+
+            snapshot = await read_event(stream)
+            assert snapshot.startswith('event: snapshot\n')
+            assert json.loads(snapshot.split('data: ', 1)[1])[0]['id'] == menu.id
+
+            # Votes of other offices are not streamed
+            get_ranking_hub().publish_tallies(menu.office_id + 1,
+                                              [{'id': menu.id + 1, 'date': date.today(), 'vote_count': 1}])
+            get_ranking_hub().publish_tallies(menu.office_id, [{'id': menu.id, 'date': date.today(), 'vote_count': 1}])
+            vote = await read_event(stream)
+            assert vote.startswith('event: vote\n')
+            assert json.loads(vote.split('data: ', 1)[1]) == {
+                'office': menu.office_id, 'menu': menu.id, 'date': date.today().isoformat(), 'vote_count': 1}
+            await stream.aclose()
+
+        async_to_sync(scenario)()
+
+    def test_events_carry_the_committed_tally(self, settings, menu):
+        settings.MENU_EVENTS = {'BROKER': 'menus.events.LocalBroker'}
+        received = []
+        get_ranking_hub().broker.add_listener(received.append)
+        Menu.objects.filter(pk=menu.pk).update(vote_count=5)
+        announce_votes.run(menu.office_id, {menu.id: menu.date})
+        assert [message['vote_count'] for message in received] == [5]
+
+    def test_vote_is_published_on_commit(self, settings, api_factory, menu, regular_user,
+                                         django_capture_on_commit_callbacks):
+        settings.MENU_EVENTS = {'BROKER': 'menus.events.LocalBroker'}
+        received = []
+        get_ranking_hub().broker.add_listener(received.append)
+        request = api_factory.post('/menus/vote/', data={'menu': menu.id})
+        request.app_version = '2.0.0'
+        force_authenticate(request, user=regular_user)
+        with django_capture_on_commit_callbacks(execute=True):
+            MenuVoteViewSet.as_view({'post': 'create'})(request)
+        assert received == [{'office': menu.office_id, 'menu': menu.id,
+                             'date': date.today().isoformat(), 'vote_count': 1}]
@@ -11,5 +11,10 @@ urlpatterns = [
                                            'delete': 'destroy'})),
     path('today_menu/', MenuViewSet.as_view({'get': 'today_menu'})),
     path('today_rating/', MenuViewSet.as_view({'get': 'today_rating'})),
+    path('search/', MenuViewSet.as_view({'get': 'search'})),
+    path('schedule/', MenuViewSet.as_view({'post': 'schedule'}, **MenuViewSet.schedule.kwargs)),
+    path('results/<str:day>/', MenuViewSet.as_view({'get': 'results'})),
+    path('cache_stats/', MenuViewSet.as_view({'get': 'cache_stats'})),
     path('vote/', MenuVoteViewSet.as_view({'post': 'create'})),
+    path('vote/batch/', MenuVoteViewSet.as_view({'post': 'batch'})),
 ]
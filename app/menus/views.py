@@ -1,68 +1,176 @@
-from django.db.models import Count
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, status
 from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from datetime import date
 
-from .serializers import MenuSerializer, MenuVoteSerializer
-from .models import Menu, MenuVote
-from common.permissions import (IsRestaurantStaffOrReadOnly,
+from .cache import get_ranking_cache
+from .filters import MenuFilter
+from .serializers import (DailyResultSerializer, MenuScheduleSerializer, MenuSerializer,
+                          MenuVoteSerializer, MenuVoteBatchSerializer)
+from .models import DailyResult, Dish, Menu, MenuVote
+from .signals import invalidate_ranking
+from .tasks import count_votes
+from common.conditional import ConditionalGetMixin, bump_table_version
+from common.db_router import use_primary
+from common.fast_read import FastReadMixin
+from common.pagination import MenuPagination
+from common.parsers import CSVParser
+from common.renderers import ORJSONRenderer
+from common.permissions import (IsOfficeMember,
+                                IsRestaurantStaffOrReadOnly,
                                 IsNotRestaurantStaff)
+from offices.tenancy import request_office
 
 
-class MenuViewSet(viewsets.ModelViewSet):
+class MenuViewSet(ConditionalGetMixin, FastReadMixin, viewsets.ModelViewSet):
     serializer_class = MenuSerializer
     permission_classes = [IsRestaurantStaffOrReadOnly]
+    pagination_class = MenuPagination
+    filter_backends = [MenuFilter]
     queryset = Menu.objects.all()
 
     @action(methods=['get'], url_path='today_menu', detail=False)
     def today_menu(self, request):
-        menu = (self.queryset
+        return self._cached_ranking('today_menu', self._render_today_menu)
+
+    @action(methods=['get'], url_path='today_rating', detail=False)
+    def today_rating(self, request):
+        return self._cached_ranking('today_rating', self._render_today_rating)
+
+    @action(methods=['get'], url_path='search', detail=False)
+    def search(self, request):
+        """Menus serving a dish matching ?q=, takes the list filters too"""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'This parameter is required.'})
+
+        menus = (self.get_queryset()
+                 .filter(dish_items__in=Dish.objects.search(query))
+                 .distinct())
+        page = self.paginate_queryset(self.filter_queryset(menus))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(methods=['post'], url_path='schedule', detail=False, parser_classes=[JSONParser, CSVParser])
+    def schedule(self, request):
+        """
+        Publish or replace many menus at once: a JSON list (or {"menus": [...]})
+        or a CSV with a restaurant,date,dishes header
+        """
+        data = request.data if isinstance(request.data, dict) else {'menus': request.data}
+        serializer = MenuScheduleSerializer(data=data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+
+        office = request_office(request)
+        menus = Menu.objects.schedule([
+            Menu(office=office, restaurant_id=item['restaurant'], date=item['date'], dishes=item['dishes'])
+            for item in serializer.validated_data['menus']
+        ])
+        # bulk_create sends no signals
+        for day in {menu.date for menu in menus}:
+            invalidate_ranking(office.pk, day)
+        bump_table_version(Menu)
+        return Response({'menus': MenuSerializer(menus, many=True).data})
+
+    @action(methods=['get'], url_path=r'results/(?P<day>\d{4}-\d{2}-\d{2})', detail=False)
+    def results(self, request, day):
+        """Frozen ranking of a finalized day"""
+        try:
+            day = date.fromisoformat(day)
+        except ValueError:
+            raise ValidationError({'date': 'Enter a valid date (YYYY-MM-DD).'})
+        result = get_object_or_404(DailyResult, office=request_office(request), date=day)
+        return Response(DailyResultSerializer(result).data)
+
+    @action(methods=['get'], url_path='cache_stats', detail=False)
+    def cache_stats(self, request):
+        return Response(get_ranking_cache().stats())
+
+    def _cached_ranking(self, kind, render):
+        # Rendered from the primary, a lagging replica would be cached until the next vote
+        office = request_office(self.request)
+        with use_primary():
+            content = get_ranking_cache().get_or_render(kind, office.pk, date.today(), render)
+        return HttpResponse(content, content_type='application/json')
+
+    def _render_today_menu(self):
+        menu = (self.get_queryset()
                 .filter(date=date.today())
-                .annotate(votes=Count('menu_votes'))
-                .order_by('-votes')
+                .order_by('-vote_count', 'id')
                 .first())
 
         serializer = self.get_serializer(menu)
-        return Response(serializer.data)
+        return ORJSONRenderer().render(serializer.data)
 
-    @action(methods=['get'], url_path='today_rating', detail=False)
-    def today_rating(self, request):
-        menus = (self.queryset
-                .filter(date=date.today())
-                .annotate(votes=Count('menu_votes'))
-                .order_by('-votes'))
+    def _render_today_rating(self):
+        menus = (self.get_queryset()
+                 .filter(date=date.today())
+                 .order_by('-vote_count', 'id'))
 
         serializer = self.get_serializer(menus, many=True)
-        return Response(serializer.data)
+        return ORJSONRenderer().render(serializer.data)
 
     def get_queryset(self):
-        return self.queryset
+        return self.queryset.filter(office=request_office(self.request))
+
+    def get_permissions(self):
+        if self.action == 'cache_stats':
+            return [IsAdminUser()]
+        return super().get_permissions()
 
 
 class MenuVoteViewSet(viewsets.ModelViewSet):
     serializer_class = MenuVoteSerializer
-    permission_classes = [IsNotRestaurantStaff]
+    permission_classes = [IsNotRestaurantStaff, IsOfficeMember]
     queryset = MenuVote.objects.all()
 
     def get_queryset(self):
-        return self.queryset
+        return self.queryset.filter(office=request_office(self.request))
 
-    def perform_create(self, serializer):
-        user = self.request.user
-        today = date.today()
-        app_version = self.request.app_version
+    def create(self, request, *args, **kwargs):
+        if request.app_version < '2.0.0':
+            return self._outdated_app_response()
 
-        if MenuVote.objects.filter(user=user, created_at=today).exists():
-            raise ValidationError('You have already voted!')
+        return super().create(request, *args, **kwargs)
+
+    @action(methods=['post'], url_path='batch', detail=False)
+    def batch(self, request):
+        """Record votes queued by offline clients in one request"""
+        if request.app_version < '2.0.0':
+            return self._outdated_app_response()
 
-        if app_version < '2.0.0':
-            warning_message = 'Your app version is outdated.'
-            response_data = {
-                'warning': warning_message,
-                'voting_allowed': False
-            }
-            return Response(response_data, status=status.HTTP_200_OK)
+        serializer = MenuVoteBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        menu_ids = [vote['menu'] for vote in serializer.validated_data['votes']]
 
-        serializer.save(user=user)
+        office = request_office(request)
+        statuses, voted_menus = MenuVote.objects.cast_votes(request.user, menu_ids, office.pk)
+        if voted_menus:
+            count_votes.delay(office.pk, voted_menus)
+
+        results = [{'menu': menu_id, 'status': vote_status}
+                   for menu_id, vote_status in zip(menu_ids, statuses)]
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+    def _outdated_app_response(self):
+        warning_message = 'Your app version is outdated.'
+        response_data = {
+            'warning': warning_message,
+            'voting_allowed': False
+        }
+        return Response(response_data, status=status.HTTP_200_OK)
+
+    def perform_create(self, serializer):
+        try:
+            with transaction.atomic():
+                vote = serializer.save(user=self.request.user)
+        except IntegrityError:
+            raise ValidationError('You have already voted!')
+        # The tally and the announcements run in the background once committed
+        count_votes.delay(vote.office_id, {vote.menu_id: vote.menu.date})
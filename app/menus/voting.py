@@ -0,0 +1,31 @@
+"""
+Voting window of a day: only today's menus take votes, until
+MENU_VOTING_CUTOFF (local time, HH:MM). Scheduled menus of the next
+days wait for their day, days before today are closed. finalize_days only freezes
+closed days, so late votes can never change a DailyResult.
+"""
+from datetime import date, time
+
+from django.conf import settings
+from django.utils import timezone
+
+DEFAULT_CUTOFF = '14:00'
+
+
+def voting_cutoff():
+    return time.fromisoformat(getattr(settings, 'MENU_VOTING_CUTOFF', DEFAULT_CUTOFF))
+
+
+def is_voting_open(day, now=None):
+    now = timezone.localtime(now)
+    today = now.date()
+    return day == today and now.time() < voting_cutoff()
+
+
+def last_closed_day(now=None):
+    """The latest day whose voting is over"""
+    now = timezone.localtime(now)
+    today = now.date()
+    if now.time() >= voting_cutoff():
+        return today
+    return date.fromordinal(today.toordinal() - 1)
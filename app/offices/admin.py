@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import Office
+
+
+class OfficeAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug')
+    search_fields = ('name', 'slug')
+    prepopulated_fields = {'slug': ('name', )}
+
+
+admin.site.register(Office, OfficeAdmin)
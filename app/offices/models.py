@@ -0,0 +1,14 @@
+"""
+Offices (tenants) of the deployment: users, restaurants, menus and votes
+belong to one office, requests are resolved to one by TenantMiddleware
+"""
+from django.db import models
+
+
+class Office(models.Model):
+    name = models.CharField(max_length=255)
+    # Value of the X-Office header or the subdomain
+    slug = models.SlugField(unique=True)
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,112 @@
+"""
+Office lookup by slug, cached in the process since offices hardly ever
+change (unknown slugs too, up to MAX_CACHED_SLUGS slugs), and the
+office of the current request. Changes clear the cache of the process
+that made them, the other workers see them after OFFICES['CACHE_TIMEOUT']
+seconds.
+"""
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from .models import Office
+
+DEFAULT_OFFICE = 'main'
+DEFAULT_CACHE_TIMEOUT = 30
+MAX_CACHED_SLUGS = 1024
+
+# slug -> (expiry, office), an office of None marks an unknown slug
+_offices = {}
+_lock = threading.Lock()
+
+
+def default_office_slug():
+    return getattr(settings, 'OFFICES', {}).get('DEFAULT', DEFAULT_OFFICE)
+
+
+def cache_timeout():
+    return getattr(settings, 'OFFICES', {}).get('CACHE_TIMEOUT', DEFAULT_CACHE_TIMEOUT)
+
+
+def _cached(slug):
+    """(found, office) of the cache entry of the slug"""
+    entry = _offices.get(slug)
+    if entry is None or entry[0] <= time.monotonic():
+        return False, None
+    return True, entry[1]
+
+
+def cached_office(slug):
+    return _cached(slug)[1]
+
+
+def is_unknown_office(slug):
+    """Whether the slug was recently looked up and matched no office"""
+    found, office = _cached(slug)
+    return found and office is None
+
+
+def get_office(slug):
+    """Office with the slug or None, the default office is created on first use"""
+    found, office = _cached(slug)
+    if not found:
+        if slug == default_office_slug():
+            office, _ = Office.objects.get_or_create(slug=slug, defaults={'name': slug.title()})
+        else:
+            office = Office.objects.filter(slug=slug).first()
+        with _lock:
+            # Bounded, the slugs come from request headers
+            if len(_offices) >= MAX_CACHED_SLUGS:
+                _offices.clear()
+            _offices[slug] = (time.monotonic() + cache_timeout(), office)
+    return office
+
+
+def get_default_office():
+    return get_office(default_office_slug())
+
+
+def default_office_id():
+    """Default of the office foreign keys"""
+    return get_default_office().pk
+
+
+def request_office(request):
+    """Office resolved by TenantMiddleware, the default one for requests that skipped it"""
+    office = getattr(request, 'office', None)
+    return office if office is not None else get_default_office()
+
+
+async def arequest_office(request):
+    """Async variant of request_office"""
+    office = getattr(request, 'office', None)
+    if office is None:
+        office = cached_office(default_office_slug()) or await sync_to_async(get_default_office)()
+    return office
+
+
+@receiver([post_save, post_delete], sender=Office)
+def office_changed(sender, instance, **kwargs):
+    clear_offices()
+
+
+@receiver(post_migrate)
+def offices_flushed(sender, **kwargs):
+    # Also sent by flush, which removes the rows without signals
+    clear_offices()
+
+
+@receiver(setting_changed)
+def reset_offices(setting, **kwargs):
+    if setting == 'OFFICES':
+        clear_offices()
+
+
+def clear_offices():
+    with _lock:
+        _offices.clear()
@@ -0,0 +1,199 @@
+import json
+from datetime import date
+from unittest import mock
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from menus.cache import get_ranking_cache
+from menus.models import DailyResult, Menu, MenuVote
+from menus.views import MenuViewSet, MenuVoteViewSet
+from restaurants.models import Restaurant
+from restaurants.views import RestaurantViewSet
+from users.tokens import ClaimsRefreshToken
+from .models import Office
+from .tenancy import get_default_office, get_office, is_unknown_office
+
+User = get_user_model()
+
+
+@pytest.fixture
+def acme():
+    return Office.objects.create(name='Acme', slug='acme')
+
+
+def create_menu(office, email):
+    manager = User.objects.create_user(email=email, name='Manager', password='testpass123',
+                                       is_restaurant_staff=True, office=office)
+    restaurant = Restaurant.objects.create(manager=manager, office=office, title=f'{office.slug} Restaurant',
+                                           address='1 Test St', phone_number='+1234567890')
+    return Menu.objects.create(restaurant=restaurant, date=date.today(), dishes='Soup')
+
+
+@pytest.fixture
+def main_menu():
+    return create_menu(get_default_office(), 'main-manager@example.com')
+
+
+@pytest.fixture
+def acme_menu(acme):
+    return create_menu(acme, 'acme-manager@example.com')
+
+
+@pytest.fixture
+def acme_user(acme):
+    return User.objects.create_user(email='acme@example.com', name='Acme User',
+                                    password='testpass123', office=acme)
+
+
+@pytest.fixture(autouse=True)
+def voting_open_all_day(settings):
+    settings.MENU_VOTING_CUTOFF = '23:59:59.999999'
+
+
+@pytest.fixture(autouse=True)
+def clear_ranking_cache():
+    get_ranking_cache().clear()
+    yield
+    get_ranking_cache().clear()
+
+
+@pytest.mark.django_db
+class TestTenancy:
+    def test_default_office_is_created_once(self):
+        office = get_default_office()
+        assert office.slug == 'main'
+        assert get_office('main') == office
+        assert get_office('unknown') is None
+
+    def test_office_lookups_are_cached(self, acme, django_assert_num_queries):
+        get_office('acme')
+        with django_assert_num_queries(0):
+            assert get_office('acme') == acme
+
+    def test_menu_and_vote_take_the_office_of_their_restaurant(self, acme_menu, acme_user):
+        assert acme_menu.office_id == acme_menu.restaurant.office_id
+        vote = MenuVote.objects.create(menu=acme_menu, user=acme_user)
+        assert vote.office_id == acme_menu.office_id
+
+    def test_new_users_join_the_default_office(self):
+        user = User.objects.create_user(email='new@example.com', password='testpass123')
+        assert user.office == get_default_office()
+
+
+@pytest.mark.django_db
+class TestTenantMiddleware:
+    def test_header_selects_the_office(self, main_menu, acme_menu):
+        response = APIClient().get('/api/menus/', HTTP_X_OFFICE='acme')
+        assert [menu['id'] for menu in response.data['results']] == [acme_menu.id]
+        assert 'X-Office' in response['Vary']
+
+        response = APIClient().get('/api/menus/')
+        assert [menu['id'] for menu in response.data['results']] == [main_menu.id]
+
+    @override_settings(OFFICES={'DEFAULT': 'main', 'DOMAIN': 'lunch.example.com'})
+    def test_subdomain_selects_the_office(self, main_menu, acme_menu):
+        response = APIClient().get('/api/menus/', HTTP_HOST='acme.lunch.example.com')
+        assert [menu['id'] for menu in response.data['results']] == [acme_menu.id]
+
+    def test_unknown_office_is_not_found(self):
+        response = APIClient().get('/api/menus/', HTTP_X_OFFICE='nowhere')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert json.loads(response.content) == {'detail': 'Unknown office.'}
+
+    def test_unknown_office_lookups_are_cached(self, django_assert_num_queries):
+        APIClient().get('/api/menus/', HTTP_X_OFFICE='nowhere')
+        with django_assert_num_queries(0):
+            response = APIClient().get('/api/menus/', HTTP_X_OFFICE='nowhere')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_created_office_is_no_longer_unknown(self):
+        assert get_office('branch') is None
+        Office.objects.create(name='Branch', slug='branch')
+        assert get_office('branch').slug == 'branch'
+
+    def test_other_workers_see_new_offices_after_the_timeout(self, settings):
+        settings.OFFICES = {**settings.OFFICES, 'CACHE_TIMEOUT': 30}
+        with mock.patch('offices.tenancy.time.monotonic', return_value=100.0):
+            assert get_office('branch') is None
+        # Created by another worker, no signal reaches this one
+        Office.objects.bulk_create([Office(name='Branch', slug='branch')])
+        with mock.patch('offices.tenancy.time.monotonic', return_value=129.0):
+            assert is_unknown_office('branch')
+        with mock.patch('offices.tenancy.time.monotonic', return_value=130.0):
+            assert get_office('branch').slug == 'branch'
+
+    def test_health_checks_skip_the_office(self, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            response = APIClient().get('/healthz/', HTTP_X_OFFICE='nowhere')
+        assert response.status_code == status.HTTP_200_OK
+        assert APIClient().get('/readyz/', HTTP_X_OFFICE='nowhere').status_code == status.HTTP_200_OK
+
+    def test_async_views_are_scoped(self, main_menu, acme_menu):
+        response = async_to_sync(AsyncClient().get)('/api/async/menus/today_rating/', headers={'X-Office': 'acme'})
+        assert [menu['id'] for menu in json.loads(response.content)] == [acme_menu.id]
+        response = async_to_sync(AsyncClient().get)(f'/api/async/menus/{main_menu.id}/', headers={'X-Office': 'acme'})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestOfficeScoping:
+    def request(self, method, path, office, user=None, **kwargs):
+        request = getattr(APIRequestFactory(), method)(path, **kwargs)
+        request.office = office
+        request.app_version = '2.0.0'
+        if user is not None:
+            force_authenticate(request, user=user)
+        return request
+
+    def test_restaurants_are_listed_and_created_per_office(self, acme, main_menu, acme_menu):
+        response = RestaurantViewSet.as_view({'get': 'list'})(self.request('get', '/restaurants/', acme))
+        assert [restaurant['id'] for restaurant in response.data['results']] == [acme_menu.restaurant_id]
+
+        request = self.request('post', '/restaurants/', acme, user=acme_menu.restaurant.manager,
+                               data={'title': 'New', 'address': '2 Test St', 'phone_number': '+1234567890'})
+        response = RestaurantViewSet.as_view({'post': 'create'})(request)
+        assert Restaurant.objects.get(pk=response.data['id']).office == acme
+
+    def test_rankings_are_cached_per_office(self, acme, main_menu, acme_menu):
+        view = MenuViewSet.as_view({'get': 'today_rating'})
+        main = view(self.request('get', '/menus/today_rating/', get_default_office()))
+        other = view(self.request('get', '/menus/today_rating/', acme))
+        assert [menu['id'] for menu in json.loads(main.content)] == [main_menu.id]
+        assert [menu['id'] for menu in json.loads(other.content)] == [acme_menu.id]
+        assert get_ranking_cache().stats()['misses'] == 2
+
+    def test_vote_for_another_office_menu_is_rejected(self, acme, main_menu, acme_user):
+        request = self.request('post', '/menus/vote/', acme, user=acme_user, data={'menu': main_menu.id})
+        response = MenuVoteViewSet.as_view({'post': 'create'})(request)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not MenuVote.objects.exists()
+
+    def test_batch_votes_for_another_office_menu_are_invalid(self, acme, main_menu, acme_menu, acme_user):
+        request = self.request('post', '/menus/vote/batch/', acme, user=acme_user, format='json',
+                               data={'votes': [{'menu': main_menu.id}, {'menu': acme_menu.id}]})
+        response = MenuVoteViewSet.as_view({'post': 'batch'})(request)
+        assert [result['status'] for result in response.data['results']] == [
+            MenuVote.objects.INVALID_MENU, MenuVote.objects.CREATED]
+        assert MenuVote.objects.get().office == acme
+
+    def test_only_members_vote_in_an_office(self, main_menu, acme_user):
+        request = self.request('post', '/menus/vote/', get_default_office(), user=acme_user,
+                               data={'menu': main_menu.id})
+        response = MenuVoteViewSet.as_view({'post': 'create'})(request)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_token_carries_the_office(self, acme_user):
+        token = ClaimsRefreshToken.for_user(acme_user).access_token
+        assert token['office_id'] == acme_user.office_id
+
+    def test_days_are_finalized_per_office(self, main_menu, acme_menu, acme_user):
+        MenuVote.objects.create(menu=acme_menu, user=acme_user)
+        main = DailyResult.objects.finalize(date.today())
+        other = DailyResult.objects.finalize(date.today(), acme_menu.office_id)
+        assert (main.office_id, main.menu_id) == (main_menu.office_id, None)
+        assert (other.office_id, other.menu_id, other.votes) == (acme_menu.office_id, acme_menu.id, 1)
@@ -3,7 +3,10 @@ from .models import Restaurant
 
 
 class RestaurantAdmin(admin.ModelAdmin):
-    list_display = ('id', 'title', 'address', 'phone_number')
+    list_display = ('id', 'title', 'address', 'phone_number', 'office')
+    list_filter = ('office', )
+    search_fields = ('title', )
+    autocomplete_fields = ('manager', )
 
 
 admin.site.register(Restaurant, RestaurantAdmin)
@@ -0,0 +1,11 @@
+from django.urls import path
+from . import async_views
+
+
+app_name = 'restaurants_async'
+
+
+urlpatterns = [
+    path('', async_views.restaurant_list, name='restaurants'),
+    path('<int:pk>/', async_views.restaurant_detail, name='restaurant-detail'),
+]
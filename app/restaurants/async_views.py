@@ -0,0 +1,39 @@
+"""
+ASGI native read endpoints for restaurants, they mirror the GET actions
+of RestaurantViewSet but use the async ORM
+"""
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+
+from common.authentication import async_jwt_authenticated
+from common.pagination import RestaurantPagination
+from common.responses import json_response
+from offices.tenancy import arequest_office
+from .models import Restaurant
+from .serializers import RestaurantSerializer
+
+
+@require_safe
+@async_jwt_authenticated
+async def restaurant_list(request):
+    request = Request(request)
+    paginator = RestaurantPagination()
+    restaurants = Restaurant.objects.filter(office=await arequest_office(request))
+    try:
+        page = await paginator.apaginate_queryset(restaurants, request)
+    except APIException as exc:
+        return json_response(exc.detail, status=exc.status_code)
+    serializer = RestaurantSerializer(page, many=True)
+    return json_response(paginator.get_paginated_response(serializer.data).data)
+
+
+@require_safe
+@async_jwt_authenticated
+async def restaurant_detail(request, pk):
+    try:
+        restaurant = await Restaurant.objects.aget(pk=pk, office=await arequest_office(request))
+    except Restaurant.DoesNotExist:
+        # The body of the sync view's 404
+        return json_response({'detail': 'No Restaurant matches the given query.'}, status=404)
+    return json_response(RestaurantSerializer(restaurant).data)
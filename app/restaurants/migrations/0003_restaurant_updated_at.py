@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurants', '0002_remove_menuvote_menu_remove_menuvote_user_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurant',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
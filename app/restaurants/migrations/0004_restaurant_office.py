@@ -0,0 +1,42 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:02
+
+import django.db.models.deletion
+import offices.tenancy
+from django.db import migrations, models
+
+from offices.tenancy import default_office_slug
+
+
+def assign_default_office(apps, schema_editor):
+    """Existing restaurants belong to the default office"""
+    Office = apps.get_model('offices', 'Office')
+    Restaurant = apps.get_model('restaurants', 'Restaurant')
+    slug = default_office_slug()
+    office, _ = Office.objects.get_or_create(slug=slug, defaults={'name': slug.title()})
+    Restaurant.objects.filter(office__isnull=True).update(office=office)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('offices', '0001_initial'),
+        ('restaurants', '0003_restaurant_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurant',
+            name='office',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='restaurants', to='offices.office'),
+        ),
+        migrations.RunPython(assign_default_office, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='restaurant',
+            name='office',
+            field=models.ForeignKey(default=offices.tenancy.default_office_id, on_delete=django.db.models.deletion.PROTECT, related_name='restaurants', to='offices.office'),
+        ),
+        migrations.AddIndex(
+            model_name='restaurant',
+            index=models.Index(fields=['office', 'id'], name='restaurant_office_id_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurants', '0004_restaurant_office'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='restaurant',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -1,8 +1,16 @@
 from django.db import models
 from django.conf import settings
 
+from offices.tenancy import default_office_id
+
 
 class Restaurant(models.Model):
+    office = models.ForeignKey(
+        'offices.Office',
+        on_delete=models.PROTECT,
+        default=default_office_id,
+        related_name='restaurants'
+    )
     manager = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -11,6 +19,13 @@ class Restaurant(models.Model):
     title = models.CharField(max_length=255)
     address = models.CharField(max_length=255)
     phone_number = models.CharField(max_length=20)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Paginated list of an office
+            models.Index(fields=['office', 'id'], name='restaurant_office_id_idx'),
+        ]
 
     def __str__(self):
         return self.title
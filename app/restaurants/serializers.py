@@ -8,7 +8,11 @@ class RestaurantSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Restaurant
-        fields = '__all__'
+        fields = ['id',
+                  'manager',
+                  'title',
+                  'address',
+                  'phone_number']
 
     def validated_owner(self, value):
         if Restaurant.objects.filter(manager=value).exists():
@@ -0,0 +1,13 @@
+"""
+Signal handlers that keep the restaurant ETags in sync with the data
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from common.conditional import bump_table_version
+from .models import Restaurant
+
+
+@receiver([post_save, post_delete], sender=Restaurant)
+def bump_restaurant_version(sender, **kwargs):
+    bump_table_version(Restaurant)
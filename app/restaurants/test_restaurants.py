@@ -1,6 +1,10 @@
+import json
+
 import pytest
+from asgiref.sync import async_to_sync
 from django.contrib.auth import get_user_model
-from rest_framework.test import APIRequestFactory, force_authenticate
+from django.test import AsyncClient
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
 from rest_framework import status
 
 from .models import Restaurant
@@ -129,8 +133,22 @@ class TestRestaurantViewSet:
         view = RestaurantViewSet.as_view({'get': 'list'})
         response = view(request)
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == 1
-        assert response.data[0]['title'] == restaurant.title
+        assert len(response.data['results']) == 1
+        assert response.data['results'][0]['title'] == restaurant.title
+
+    def test_list_reflects_new_restaurants(self, api_factory, restaurant, staff_user):
+        view = RestaurantViewSet.as_view({'get': 'list'})
+        view(api_factory.get('/restaurants/'))
+        Restaurant.objects.create(manager=staff_user, title='Another', address='1 St', phone_number='+1')
+        response = view(api_factory.get('/restaurants/'))
+        assert len(response.data['results']) == 2
+
+    def test_list_restaurants_is_paginated(self, api_factory, restaurant, staff_user):
+        Restaurant.objects.create(manager=staff_user, title='Another', address='1 St', phone_number='+1')
+        view = RestaurantViewSet.as_view({'get': 'list'})
+        response = view(api_factory.get('/restaurants/?page_size=1'))
+        assert [item['id'] for item in response.data['results']] == [restaurant.id]
+        assert response.data['next'] is not None
 
     def test_retrieve_restaurant_unauthenticated(self, api_factory, restaurant):
         request = api_factory.get('/restaurants/')
@@ -138,3 +156,21 @@ class TestRestaurantViewSet:
         response = view(request, pk=restaurant.pk)
         assert response.status_code == status.HTTP_200_OK
         assert response.data['title'] == restaurant.title
+
+
+@pytest.mark.django_db
+class TestAsyncRestaurantViews:
+    def test_list(self, restaurant):
+        response = async_to_sync(AsyncClient().get)('/api/async/restaurants/')
+        assert response.status_code == status.HTTP_200_OK
+        assert json.loads(response.content)['results'][0]['title'] == restaurant.title
+
+    def test_retrieve(self, restaurant):
+        response = async_to_sync(AsyncClient().get)(f'/api/async/restaurants/{restaurant.pk}/')
+        assert response.status_code == status.HTTP_200_OK
+        assert json.loads(response.content)['title'] == restaurant.title
+
+    def test_retrieve_missing(self):
+        response = async_to_sync(AsyncClient().get)('/api/async/restaurants/999999/')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.content == APIClient().get('/api/restaurants/999999/').content
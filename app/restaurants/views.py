@@ -2,16 +2,21 @@ from rest_framework import viewsets
 
 from .models import Restaurant
 from .serializers import RestaurantSerializer
+from common.conditional import ConditionalGetMixin
+from common.fast_read import FastReadMixin
+from common.pagination import RestaurantPagination
 from common.permissions import IsRestaurantStaffOrReadOnly
+from offices.tenancy import request_office
 
 
-class RestaurantViewSet(viewsets.ModelViewSet):
+class RestaurantViewSet(ConditionalGetMixin, FastReadMixin, viewsets.ModelViewSet):
     serializer_class = RestaurantSerializer
     permission_classes = [IsRestaurantStaffOrReadOnly]
+    pagination_class = RestaurantPagination
     queryset = Restaurant.objects.all()
 
     def get_queryset(self):
-        return self.queryset
+        return self.queryset.filter(office=request_office(self.request))
 
     def perform_create(self, serializer):
-        serializer.save(manager=self.request.user)
+        serializer.save(manager=self.request.user, office=request_office(self.request))
@@ -4,6 +4,7 @@ Custom Django Admin
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
+from common.pagination import EstimatedCountPaginator
 from users.models import User
 
 
@@ -11,8 +12,13 @@ class UserAdmin(BaseUserAdmin):
     """Admin page for users"""
     ordering = ['id']
     list_display = ['email', 'name', 'id']
+    # Also what the user autocomplete of the vote admins searches
+    search_fields = ['email', 'name']
+    list_filter = ['office', 'is_active', 'is_staff', 'is_restaurant_staff']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     fieldsets = (
-        (None, {'fields': ('email', 'password')}),
+        (None, {'fields': ('email', 'password', 'office')}),
         (
             'Permissions',
             {'fields': ('is_active',
@@ -28,6 +34,7 @@ class UserAdmin(BaseUserAdmin):
                        'name',
                        'password1',
                        'password2',
+                       'office',
                        'is_active',
                        'is_staff',
                        'is_restaurant_staff',
@@ -0,0 +1,10 @@
+from django.urls import path
+from . import async_views
+
+
+app_name = 'user_async'
+
+
+urlpatterns = [
+    path('login/', async_views.login, name='login'),
+]
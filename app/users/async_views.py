@@ -0,0 +1,55 @@
+"""
+ASGI native login: the request waits for the password hashing pool
+(users.hashing) without holding the thread the sync views run on
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework_simplejwt.settings import api_settings
+
+from common.responses import json_response
+from .hashing import HashingBusy, amake_password
+from .tokens import ClaimsRefreshToken
+
+NO_ACTIVE_ACCOUNT = 'No active account found with the given credentials'
+
+
+@csrf_exempt
+@require_POST
+async def login(request):
+    """Same credentials and tokens as LoginView"""
+    User = get_user_model()
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return json_response({'detail': 'JSON parse error.'}, status=400)
+    if not isinstance(data, dict):
+        return json_response({'detail': 'Expected a JSON object.'}, status=400)
+
+    missing = {field: ['This field is required.']
+               for field in (User.USERNAME_FIELD, 'password') if not data.get(field)}
+    if missing:
+        return json_response(missing, status=400)
+
+    try:
+        user = await User.objects.filter(**{User.USERNAME_FIELD: data[User.USERNAME_FIELD]}).afirst()
+        if user is None:
+            # Hash anyway, like ModelBackend, so unknown emails take as long
+            await amake_password(data['password'])
+            correct = False
+        else:
+            correct = await user.acheck_password(data['password'])
+    except HashingBusy as exc:
+        return json_response({'detail': exc.detail}, status=exc.status_code)
+
+    if not correct or not api_settings.USER_AUTHENTICATION_RULE(user):
+        return json_response({'detail': NO_ACTIVE_ACCOUNT}, status=401)
+
+    refresh = ClaimsRefreshToken.for_user(user)
+    if api_settings.UPDATE_LAST_LOGIN:
+        await sync_to_async(update_last_login)(None, user)
+    return json_response({'refresh': str(refresh), 'access': str(refresh.access_token)})
@@ -0,0 +1,15 @@
+"""
+PBKDF2 with a work factor sized for this deployment, see the
+bench_hashers command. Hashes with another iteration count (or of
+another listed hasher) still verify and are upgraded on the next login.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """Same algorithm and encoding as Django's, PASSWORD_HASHING['ITERATIONS'] rounds"""
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_HASHING', {}).get('ITERATIONS') or PBKDF2PasswordHasher.iterations
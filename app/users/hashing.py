@@ -0,0 +1,189 @@
+"""
+Password hashing off the request threads.
+
+The key derivation of a password hasher is CPU bound by design, a login
+storm hashing in the request threads starves every other endpoint of the
+same worker. User.set_password/check_password hand the work to the
+executor configured by PASSWORD_HASHING['BACKEND']: ProcessPoolBackend
+runs it on a pool of processes, InlineBackend in the calling thread.
+
+At most `max_pending` passwords are queued or hashing at once per
+process, a request that can't get a slot within `timeout` seconds fails
+with 503 (HashingBusy) instead of piling up. The pool processes read the
+settings module, settings overridden at runtime (tests) need InlineBackend. A pool broken
+by a dead process (e.g. the OOM killer) is replaced and the password
+retried once.
+"""
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+DEFAULT_BACKEND = 'users.hashing.ProcessPoolBackend'
+
+
+class HashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many logins at once, try again in a moment.'
+    default_code = 'hashing_busy'
+
+
+def encode(password):
+    """make_password() in the executor"""
+    return hashers.make_password(password)
+
+
+def verify(password, encoded):
+    """
+    check_password() in the executor, returns whether the password is
+    correct and its new encoding when the hash has to be upgraded
+    """
+    upgraded = []
+    correct = hashers.check_password(password, encoded, setter=lambda raw: upgraded.append(encode(raw)))
+    return correct, upgraded[0] if upgraded else None
+
+
+class InlineBackend:
+    """Hash in the calling thread (tests, management commands)"""
+    def __init__(self, **options):
+        pass
+
+    def run(self, func, *args):
+        return func(*args)
+
+    async def arun(self, func, *args):
+        return func(*args)
+
+    def shutdown(self, wait=True):
+        pass
+
+
+class ProcessPoolBackend:
+    """Hash on a pool of `max_workers` processes, started on first use"""
+    def __init__(self, max_workers=2, max_pending=64, timeout=10, **options):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def run(self, func, *args):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise HashingBusy()
+        try:
+            for retry in (True, False):
+                executor = self.executor
+                try:
+                    return executor.submit(func, *args).result()
+                except BrokenProcessPool:
+                    self._discard(executor)
+                    if not retry:
+                        raise
+        finally:
+            self._slots.release()
+
+    async def arun(self, func, *args):
+        await self._aacquire()
+        try:
+            for retry in (True, False):
+                executor = self.executor
+                try:
+                    return await asyncio.wrap_future(executor.submit(func, *args))
+                except BrokenProcessPool:
+                    self._discard(executor)
+                    if not retry:
+                        raise
+        finally:
+            self._slots.release()
+
+    async def _aacquire(self):
+        if self._slots.acquire(blocking=False):
+            return
+        waiter = asyncio.ensure_future(asyncio.to_thread(self._slots.acquire, timeout=self.timeout))
+        try:
+            acquired = await asyncio.shield(waiter)
+        except asyncio.CancelledError:
+            # The thread keeps waiting, give back the slot it may still get
+            waiter.add_done_callback(self._release_abandoned)
+            raise
+        if not acquired:
+            raise HashingBusy()
+
+    def _release_abandoned(self, waiter):
+        if not waiter.cancelled() and waiter.exception() is None and waiter.result():
+            self._slots.release()
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # Spawned, forking a process running threads is unsafe. The
+                    # workers load the settings (PASSWORD_HASHERS) on first use
+                    self._executor = ProcessPoolExecutor(self.max_workers,
+                                                         mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def _discard(self, executor):
+        """Drop a broken pool, the next submission starts a new one"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+
+
+def make_password(password):
+    if password is None:
+        # An unusable password, nothing to hash
+        return hashers.make_password(None)
+    return get_hashing_backend().run(encode, password)
+
+
+def check_password(password, encoded):
+    """Returns (correct, upgraded encoding or None)"""
+    return get_hashing_backend().run(verify, password, encoded)
+
+
+async def amake_password(password):
+    if password is None:
+        return hashers.make_password(None)
+    return await get_hashing_backend().arun(encode, password)
+
+
+async def acheck_password(password, encoded):
+    return await get_hashing_backend().arun(verify, password, encoded)
+
+
+_hashing_backend = None
+
+
+def get_hashing_backend():
+    """Return the process wide executor configured by PASSWORD_HASHING"""
+    global _hashing_backend
+    if _hashing_backend is None:
+        config = getattr(settings, 'PASSWORD_HASHING', {})
+        backend_class = import_string(config.get('BACKEND', DEFAULT_BACKEND))
+        _hashing_backend = backend_class(**config.get('OPTIONS', {}))
+    return _hashing_backend
+
+
+@receiver(setting_changed)
+def reset_hashing_backend(setting, **kwargs):
+    global _hashing_backend
+    if setting in ('PASSWORD_HASHING', 'PASSWORD_HASHERS'):
+        if _hashing_backend is not None:
+            _hashing_backend.shutdown(wait=False)
+        _hashing_backend = None
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from offices.tenancy import default_office_slug
+
+
+def assign_default_office(apps, schema_editor):
+    """Existing employees belong to the default office"""
+    Office = apps.get_model('offices', 'Office')
+    User = apps.get_model('users', 'User')
+    slug = default_office_slug()
+    office, _ = Office.objects.get_or_create(slug=slug, defaults={'name': slug.title()})
+    User.objects.filter(office__isnull=True, is_superuser=False).update(office=office)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('offices', '0001_initial'),
+        ('users', '0003_user_token_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='office',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='users', to='offices.office'),
+        ),
+        migrations.RunPython(assign_default_office, migrations.RunPython.noop),
+    ]
@@ -6,6 +6,9 @@ from django.contrib.auth.models import (AbstractBaseUser,
                                         BaseUserManager,
                                         PermissionsMixin)
 
+from offices.tenancy import default_office_id
+from . import hashing
+
 
 class UserManager(BaseUserManager):
 
@@ -13,6 +16,8 @@ class UserManager(BaseUserManager):
         """Create, save and return a new user"""
         if not email:
             raise ValueError('Email is required!')
+        if 'office' not in extra_fields:
+            extra_fields.setdefault('office_id', default_office_id())
 
         user = self.model(email=self.normalize_email(email),
                          **extra_fields)
@@ -37,6 +42,16 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     is_restaurant_staff = models.BooleanField(default=False)
+    # Bumped to invalidate issued access tokens, see users/tokens.py
+    token_version = models.PositiveIntegerField(default=0)
+    # Office the employee votes in, staff may act in every office
+    office = models.ForeignKey(
+        'offices.Office',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='users'
+    )
 
     objects = UserManager()
 
@@ -44,3 +59,29 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     def __str__(self):
         return self.email
+
+    # Hashing runs in the executor of users.hashing, not the request thread
+
+    def set_password(self, raw_password):
+        self.password = hashing.make_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        correct, upgraded = hashing.check_password(raw_password, self.password)
+        if upgraded:
+            self._upgrade_password(upgraded)
+            User.objects.filter(pk=self.pk).update(password=upgraded)
+        return correct
+
+    async def acheck_password(self, raw_password):
+        correct, upgraded = await hashing.acheck_password(raw_password, self.password)
+        if upgraded:
+            self._upgrade_password(upgraded)
+            await User.objects.filter(pk=self.pk).aupdate(password=upgraded)
+        return correct
+
+    def _upgrade_password(self, encoded):
+        # Saved with update(), a new hash of the same password is not a
+        # password change and must not revoke the tokens (users.signals)
+        self.password = encoded
+        self._password = None
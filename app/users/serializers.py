@@ -3,6 +3,9 @@ Serializer for the employee API View
 """
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+
+from .tokens import ClaimsRefreshToken
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -12,6 +15,11 @@ class UserSerializer(serializers.ModelSerializer):
         extra_kwargs = {'password': {'write_only': True, 'min_length': 5}}
 
     def create(self, validated_data):
-        """Creates user with encrypted password"""
+        """Creates user with encrypted password, hashed on the pool of users.hashing"""
         user = get_user_model().objects.create_user(**validated_data)
         return user
+
+
+class LoginSerializer(TokenObtainPairSerializer):
+    """Issues tokens that carry the user claims used by the permissions"""
+    token_class = ClaimsRefreshToken
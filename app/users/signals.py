@@ -0,0 +1,35 @@
+"""
+Invalidate issued access tokens when the password or a field they
+carry (USER_CLAIMS) changes, e.g. a demoted user or a deactivated one
+"""
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from .models import User
+from .tokens import USER_CLAIMS, set_token_version
+
+REVOKING_FIELDS = tuple(claim for claim in USER_CLAIMS if claim != 'token_version') + ('password',)
+# Also by field name, save(update_fields=...) takes both
+REVOKING_NAMES = frozenset(REVOKING_FIELDS) | {User._meta.get_field(field).name for field in REVOKING_FIELDS}
+
+
+@receiver(pre_save, sender=User)
+def bump_token_version(sender, instance, update_fields=None, **kwargs):
+    if instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and REVOKING_NAMES.isdisjoint(update_fields):
+        # e.g. last_login on every login
+        return
+    previous = (User.objects
+                .filter(pk=instance.pk)
+                .values(*REVOKING_FIELDS)
+                .first())
+    if previous is None:
+        return
+    if any(previous[field] != getattr(instance, field) for field in REVOKING_FIELDS):
+        instance.token_version = (instance.token_version or 0) + 1
+
+
+@receiver(post_save, sender=User)
+def publish_token_version(sender, instance, **kwargs):
+    set_token_version(instance.pk, instance.token_version)
@@ -1,9 +1,27 @@
+import asyncio
+import json
+import os
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
+
 import pytest
+from asgiref.sync import async_to_sync
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core.cache import cache
+from django.test import AsyncClient
 from django.urls import reverse
 from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from rest_framework.test import APIClient, APIRequestFactory
 
-from rest_framework.test import APIClient
+from common.authentication import ClaimsJWTAuthentication
+from offices.models import Office
+from .hashing import HashingBusy, ProcessPoolBackend, encode, get_hashing_backend
+from .tokens import LOCAL_CACHE_TIMEOUT, token_version_timeout
 
 CREATE_USER_URL = reverse('user:register')
 
@@ -110,3 +128,253 @@ def test_password_too_short(api_client):
         email=payload['email']
     ).exists()
     assert not user_exists
+
+
+LOGIN_URL = reverse('user:login')
+
+
+@pytest.fixture
+def login(api_client, create_user):
+    """Fixture returning the access token of a freshly logged in user."""
+    def _login(**params):
+        params.setdefault('email', 'test@example.com')
+        params.setdefault('password', 'test123')
+        user = create_user(**params)
+        res = api_client.post(LOGIN_URL, {'email': params['email'], 'password': params['password']})
+        return user, res.data['access']
+    return _login
+
+
+def authenticate(token):
+    request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+    return ClaimsJWTAuthentication().authenticate(request)
+
+
+@pytest.mark.django_db
+def test_login_token_carries_user_claims(login):
+    """Test the access token embeds the fields used by the permissions."""
+    user, access = login(is_restaurant_staff=True)
+    token = AccessToken(access)
+
+    assert token['is_restaurant_staff'] is True
+    assert token['is_active'] is True
+    assert token['token_version'] == user.token_version
+
+
+@pytest.mark.django_db
+def test_claims_authentication_without_user_query(login, django_assert_num_queries):
+    """Test the user is built from the token without a database hit."""
+    user, access = login(is_restaurant_staff=True)
+
+    with django_assert_num_queries(0):
+        authenticated, _ = authenticate(access)
+
+    assert authenticated.pk == user.pk
+    assert authenticated.is_restaurant_staff
+    assert authenticated.is_authenticated
+
+
+@pytest.mark.django_db
+def test_deactivated_user_token_rejected(login):
+    """Test deactivating a user invalidates the issued tokens."""
+    user, access = login()
+    user.is_active = False
+    user.save()
+
+    with pytest.raises(AuthenticationFailed):
+        authenticate(access)
+
+
+@pytest.mark.django_db
+def test_password_change_revokes_token(login):
+    """Test changing the password invalidates the issued tokens."""
+    user, access = login()
+    user.set_password('new-password')
+    user.save()
+
+    with pytest.raises(AuthenticationFailed):
+        authenticate(access)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('field', ['is_staff', 'is_restaurant_staff'])
+def test_demotion_revokes_token(login, field):
+    """Test revoking a role invalidates the tokens that still claim it."""
+    user, access = login(**{field: True})
+    setattr(user, field, False)
+    user.save()
+
+    with pytest.raises(AuthenticationFailed):
+        authenticate(access)
+
+
+@pytest.mark.django_db
+def test_office_change_revokes_token(login):
+    """Test moving a user to another office invalidates the issued tokens."""
+    user, access = login()
+    user.office = Office.objects.create(name='Branch', slug='branch')
+    user.save()
+
+    with pytest.raises(AuthenticationFailed):
+        authenticate(access)
+
+
+@pytest.mark.django_db
+def test_unrelated_change_keeps_token(login):
+    """Test saving fields the token doesn't carry keeps it valid."""
+    user, access = login()
+    user.name = 'Renamed'
+    user.save()
+
+    authenticated, _ = authenticate(access)
+    assert authenticated.pk == user.pk
+
+
+@pytest.mark.django_db
+def test_last_login_update_skips_the_version_check(create_user, django_assert_num_queries):
+    """Test saving fields no token carries doesn't read the user back."""
+    user = create_user(email='test@example.com', password='test123')
+
+    with django_assert_num_queries(1):
+        user.save(update_fields=['last_login'])
+
+
+def test_local_cache_keeps_versions_briefly(settings):
+    """Test other workers' bumps reach a process local cache quickly."""
+    assert token_version_timeout() == LOCAL_CACHE_TIMEOUT
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                                   'LOCATION': 'redis://localhost:6379/0'}}
+    assert token_version_timeout() == api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+
+
+@pytest.mark.django_db
+def test_token_version_read_from_db_on_cache_miss(login, django_assert_num_queries):
+    """Test the token version is loaded once when the cache is cold."""
+    user, access = login()
+    cache.clear()
+
+    with django_assert_num_queries(1):
+        authenticate(access)
+    with django_assert_num_queries(0):
+        authenticate(access)
+
+
+@pytest.mark.django_db
+def test_token_without_claims_loads_user(create_user, django_assert_num_queries):
+    """Test tokens issued without claims still authenticate from the database."""
+    user = create_user(email='test@example.com', password='test123')
+    access = AccessToken.for_user(user)
+
+    with django_assert_num_queries(1):
+        authenticated, _ = authenticate(access)
+
+    assert authenticated == user
+
+
+@pytest.mark.django_db
+def test_passwords_are_hashed_in_the_process_pool(create_user):
+    """Test set_password/check_password run on the configured process pool."""
+    user = create_user(email='test@example.com', password='test123')
+
+    assert isinstance(get_hashing_backend(), ProcessPoolBackend)
+    assert get_hashing_backend()._executor is not None
+    assert user.check_password('test123')
+    assert not user.check_password('wrong')
+
+
+def test_busy_hashing_pool_rejects_the_password():
+    """Test a full pool fails fast instead of queueing more logins."""
+    backend = ProcessPoolBackend(max_pending=1, timeout=0.01)
+    backend._slots.acquire()
+
+    with pytest.raises(HashingBusy):
+        backend.run(encode, 'test123')
+
+
+@pytest.mark.django_db
+def test_broken_hashing_pool_is_replaced():
+    """Test a pool whose process died is rebuilt and the password retried."""
+    backend = ProcessPoolBackend(max_workers=1)
+    broken = backend.executor
+    with pytest.raises(BrokenProcessPool):
+        broken.submit(os._exit, 1).result()
+
+    assert backend.run(encode, 'test123').startswith('pbkdf2_sha256$')
+    assert backend.executor is not broken
+    backend.shutdown()
+
+
+def test_hashing_pool_gives_up_after_one_retry():
+    """Test a task killing every pool fails instead of looping."""
+    backend = ProcessPoolBackend(max_workers=1)
+
+    with pytest.raises(BrokenProcessPool):
+        backend.run(os._exit, 1)
+    assert backend._executor is None
+
+
+def test_cancelled_waiter_gives_back_its_slot():
+    """Test an async login cancelled while queued doesn't leak its slot."""
+    backend = ProcessPoolBackend(max_pending=1, timeout=5)
+    backend._slots.acquire()
+
+    async def scenario():
+        waiter = asyncio.create_task(backend._aacquire())
+        await asyncio.sleep(0.05)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        backend._slots.release()
+        # The abandoned thread takes the slot and hands it back
+        await asyncio.sleep(0.1)
+        assert backend._slots.acquire(timeout=1)
+
+    async_to_sync(scenario)()
+
+
+@pytest.mark.django_db
+def test_login_answers_503_when_hashing_is_busy(api_client, create_user):
+    """Test the login view turns a full pool into 503 Service Unavailable."""
+    create_user(email='test@example.com', password='test123')
+    busy = ProcessPoolBackend(max_pending=1, timeout=0.01)
+    busy._slots.acquire()
+
+    with mock.patch('users.hashing.get_hashing_backend', return_value=busy):
+        res = api_client.post(LOGIN_URL, {'email': 'test@example.com', 'password': 'test123'})
+
+    assert res.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+
+@pytest.mark.django_db
+def test_outdated_hash_is_upgraded_on_login(settings, api_client, create_user):
+    """Test a login rehashes with the tuned work factor without revoking tokens."""
+    settings.PASSWORD_HASHING = {'BACKEND': 'users.hashing.InlineBackend', 'ITERATIONS': 2000}
+    user = create_user(email='test@example.com', password='test123')
+    outdated = PBKDF2PasswordHasher().encode('test123', 'salt', iterations=1000)
+    get_user_model().objects.filter(pk=user.pk).update(password=outdated)
+
+    res = api_client.post(LOGIN_URL, {'email': 'test@example.com', 'password': 'test123'})
+
+    assert res.status_code == status.HTTP_200_OK
+    user.refresh_from_db()
+    assert user.password.startswith('pbkdf2_sha256$2000$')
+    assert user.token_version == 0
+    assert authenticate(res.data['access'])[0].pk == user.pk
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_login_issues_claims_tokens(create_user):
+    """Test the ASGI login answers like the login view."""
+    user = create_user(email='test@example.com', password='test123')
+    url = reverse('user_async:login')
+
+    def post(payload):
+        return async_to_sync(AsyncClient().post)(url, payload, content_type='application/json')
+
+    res = post({'email': 'test@example.com', 'password': 'test123'})
+    assert res.status_code == status.HTTP_200_OK
+    assert AccessToken(json.loads(res.content)['access'])['token_version'] == user.token_version
+
+    assert post({'email': 'test@example.com', 'password': 'wrong'}).status_code == status.HTTP_401_UNAUTHORIZED
+    assert post({'email': 'nobody@example.com', 'password': 'test123'}).status_code == status.HTTP_401_UNAUTHORIZED
+    assert post({'email': 'test@example.com'}).status_code == status.HTTP_400_BAD_REQUEST
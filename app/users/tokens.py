@@ -0,0 +1,85 @@
+"""
+Access tokens that carry the user fields the permissions need, so
+requests can be authenticated without loading the user row.
+
+Every token holds the token_version of its user. Changing the password or
+one of the claimed fields (deactivation, demotion) bumps the version, the
+current version is kept in the cache and tokens with an older version are
+rejected. A process local cache (no REDIS_URL) only learns the bumps of
+other workers from the database, so it keeps versions LOCAL_CACHE_TIMEOUT
+seconds only.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+USER_CLAIMS = ('is_active', 'is_staff', 'is_restaurant_staff', 'token_version', 'office_id')
+LOCAL_CACHE_TIMEOUT = 5
+
+
+def token_version_key(user_id):
+    return f'users:token_version:{user_id}'
+
+
+def token_version_timeout():
+    if isinstance(caches['default'], (LocMemCache, DummyCache)):
+        return LOCAL_CACHE_TIMEOUT
+    # Outdated tokens can't outlive this anyway
+    return api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+
+
+def set_token_version(user_id, version):
+    cache.set(token_version_key(user_id), version, token_version_timeout())
+
+
+def get_token_version(user_id):
+    """Current token version, the database is only read on a cache miss"""
+    version = cache.get(token_version_key(user_id))
+    if version is None:
+        version = (get_user_model().objects
+                   .filter(pk=user_id)
+                   .values_list('token_version', flat=True)
+                   .first())
+        if version is not None:
+            set_token_version(user_id, version)
+    return version
+
+
+async def aget_token_version(user_id):
+    version = await cache.aget(token_version_key(user_id))
+    if version is None:
+        version = await (get_user_model().objects
+                         .filter(pk=user_id)
+                         .values_list('token_version', flat=True)
+                         .afirst())
+        if version is not None:
+            await cache.aset(token_version_key(user_id), version, token_version_timeout())
+    return version
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Refresh token whose access tokens embed USER_CLAIMS"""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+
+def has_user_claims(token):
+    return all(claim in token for claim in USER_CLAIMS)
+
+
+def user_from_claims(token):
+    """Unsaved-looking User instance built from the token, usable as a FK value"""
+    User = get_user_model()
+    user = User(pk=token[api_settings.USER_ID_CLAIM],
+                **{claim: token[claim] for claim in USER_CLAIMS})
+    user._state.adding = False
+    user._state.db = 'default'
+    return user
@@ -3,14 +3,25 @@ Views for the user API
 """
 from rest_framework import generics, permissions
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.views import TokenObtainPairView
 
-from .serializers import UserSerializer
+from offices.tenancy import request_office
+from .serializers import LoginSerializer, UserSerializer
 
 
 class CreateUserView(generics.CreateAPIView):
     """Crete a new employee in the system"""
     serializer_class = UserSerializer
 
+    def perform_create(self, serializer):
+        """Employees register in the office of the request"""
+        serializer.save(office=request_office(self.request))
+
+
+class LoginView(TokenObtainPairView):
+    """Obtain JWT tokens with the user claims embedded"""
+    serializer_class = LoginSerializer
+
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated employee"""